@@ -1,2 +1,4 @@
 # config.py
 API_URL = "http://127.0.0.1:8000"  # change ici si l'adresse de l'API change
+MAX_SCATTER_POINTS = 2000  # nombre maximum de points affichés dans les nuages de points
+PAGE_SIZES = [25, 50, 100, 250]  # tailles de page proposées dans la grille Données
@@ -1,56 +1,58 @@
+import math
+
+import pandas as pd
 import streamlit as st
 import requests
-from stroke_api.filters import filter_patient
-from modules.config import API_URL
+from modules.config import API_URL, PAGE_SIZES
+
+SORT_COLUMNS = {
+    "ID": "id",
+    "Âge": "age",
+    "IMC": "bmi",
+    "Glucose moyen": "avg_glucose_level",
+    "Score de risque": "risk_score",
+    "Genre": "gender",
+    "AVC": "stroke",
+}
 
 
-def fetch_patients(gender=None, stroke=None, min_age=0, max_age=100):
+def fetch_patients_page(filters, sort_by=None, order="asc", offset=0, limit=50):
     """
-    Récupère la liste des patients depuis l'API avec des filtres optionnels.
+    Récupère une page de patients filtrés et triés depuis l'API.
 
-    Effectue une requête GET vers l'endpoint `/patients/` de l'API définie par `API_URL`,
-    en passant des paramètres de filtrage tels que le sexe, la présence d'AVC et une
-    plage d'âge. Si la requête réussit, retourne les données JSON.
-    En cas d'erreur ou si l'API renvoie un message d'information, retourne une liste vide.
+    Effectue une requête GET vers l'endpoint `/patients/page` de l'API définie par
+    `API_URL`. Le tri et le découpage sont faits par l'API : seule la page demandée
+    transite vers l'application.
 
     Parameters
     ----------
-    gender : str, optional
-        Sexe du patient à filtrer (`"Male"`, `"Female"`, `"Other"`).
-        Par défaut : `None` (pas de filtre).
-    stroke : int | bool, optional
-        Indicateur de présence d'AVC (`1` ou `True` = AVC, `0` ou `False` = pas d'AVC).
-        Par défaut : `None` (pas de filtre).
-    min_age : int, optional
-        Âge minimum des patients à récupérer.
-        Par défaut : `0`.
-    max_age : int, optional
-        Âge maximum des patients à récupérer.
-        Par défaut : `100`.
+    filters : dict
+        Critères de filtrage (`gender`, `stroke`, `min_age`, `max_age`), tels que
+        conservés dans `st.session_state["patients_filter"]`.
+    sort_by : str, optional
+        Colonne de tri (ex. `"risk_score"`). Par défaut : `None` (ordre du dataset).
+    order : str, optional
+        `"asc"` ou `"desc"`. Par défaut : `"asc"`.
+    offset : int, optional
+        Rang du premier patient de la page. Par défaut : `0`.
+    limit : int, optional
+        Nombre de patients par page. Par défaut : `50`.
 
     Returns
     -------
-    list
-        Liste de dictionnaires représentant les patients filtrés.
-        Retourne `[]` si aucun patient ne correspond ou en cas d'erreur.
-
+    dict
+        `total` (nombre de patients correspondant aux filtres) et `items`
+        (patients de la page). Retourne `{"total": 0, "items": []}` en cas d'erreur.
     """
-    params = {
-        "gender": gender,
-        "stroke": stroke,
-        "min_age": min_age,
-        "max_age": max_age,
-    }
+    params = {**filters, "sort_by": sort_by, "order": order}
+    params.update(offset=offset, limit=limit)
     try:
-        response = requests.get(f"{API_URL}/patients/", params=params)
+        response = requests.get(f"{API_URL}/patients/page", params=params)
         response.raise_for_status()
-        data = response.json()
-        if "message" in data:
-            return []
-        return data
+        return response.json()
     except Exception as e:
         st.error(f"Erreur API : {e}")
-        return []
+        return {"total": 0, "items": []}
 
 
 def fetch_patient_by_id(patient_id):
@@ -103,16 +105,19 @@ def donnees():
         - Présence d'AVC ("Tous", "Oui", "Non")
         - Tranche d'âge (slider)
     - Bouton de réinitialisation ("Réinitialiser les filtres") qui supprime les filtres et recharge la page.
-    - Filtre les données des patients à partir de la fonction `filter_patient()` selon les critères sélectionnés.
-    - Affiche les résultats filtrés dans un tableau Streamlit (`st.dataframe`) et le nombre de patients trouvés.
+    - Affiche les résultats dans une grille paginée : tri (colonne, ordre), taille et
+      numéro de page. Chaque page est demandée à l'API (`GET /patients/page`), qui
+      trie, découpe et renvoie le nombre total de patients trouvés.
     - Gère les erreurs :
         - ID patient non valide
         - Aucun patient correspondant aux critères
-    - Sauvegarde les résultats filtrés dans `st.session_state["patients_data"]` pour utilisation dans d'autres pages de l'application.
+    - Sauvegarde les critères de filtrage (et non les patients) dans
+      `st.session_state["patients_filter"]` pour utilisation dans d'autres pages de l'application.
 
     Remarques :
     - Les filtres "Tous" correspondent à l'absence de filtrage pour ce critère.
     - La fonction repose sur `st.session_state` pour conserver les sélections entre les rechargements de la page.
+    - Le numéro de page revient à 1 dès que les filtres ou le tri changent.
     """
 
     st.header("Données")
@@ -124,7 +129,11 @@ def donnees():
             "selected_gender",
             "selected_stroke",
             "selected_age",
-            "patients_data",
+            "patients_filter",
+            "sort_label",
+            "sort_order",
+            "page_size",
+            "page_number",
         ]:
             if key in st.session_state:
                 del st.session_state[key]
@@ -172,29 +181,56 @@ def donnees():
         None if selected_stroke == "Tous" else {"Oui": 1, "Non": 0}[selected_stroke]
     )
     min_age, max_age = selected_age
+    patients_filter = {
+        "gender": gender,
+        "stroke": stroke,
+        "min_age": min_age,
+        "max_age": max_age,
+    }
+    st.session_state["patients_filter"] = patients_filter
 
-    # Récupération patients filtrés
+    # Recherche par ID : un seul patient, sans pagination
     if patient_id:
         try:
-            patient_id_int = int(patient_id)
-            patients_data = [
-                p for p in filter_patient() if p.get("id") == patient_id_int
-            ]
-            if not patients_data:
-                st.warning("Patient non trouvé.")
+            patient = fetch_patient_by_id(int(patient_id))
+            if patient is not None:
+                st.dataframe(pd.DataFrame([patient]), hide_index=True)
         except ValueError:
             st.error("ID invalide.")
-            patients_data = []
-    else:
-        patients_data = filter_patient(
-            gender=gender, stroke=stroke, min_age=min_age, max_age=max_age
-        )
+        return
 
-    st.session_state["patients_data"] = patients_data
+    # Tri et pagination
+    col1, col2, col3 = st.columns(3)
+    sort_label = col1.selectbox(
+        "Trier par", ["Aucun tri", *SORT_COLUMNS], key="sort_label"
+    )
+    sort_order = col2.radio(
+        "Ordre", ["Croissant", "Décroissant"], horizontal=True, key="sort_order"
+    )
+    page_size = col3.selectbox("Patients par page", PAGE_SIZES, key="page_size")
+
+    grid_state = (tuple(patients_filter.values()), sort_label, sort_order, page_size)
+    if st.session_state.get("grid_state") != grid_state:
+        st.session_state["grid_state"] = grid_state
+        st.session_state["page_number"] = 1
+    page_number = st.session_state.get("page_number", 1)
+
+    page = fetch_patients_page(
+        patients_filter,
+        sort_by=SORT_COLUMNS.get(sort_label),
+        order="desc" if sort_order == "Décroissant" else "asc",
+        offset=(page_number - 1) * page_size,
+        limit=page_size,
+    )
 
     # Affichage
-    if not patients_data:
+    total = page["total"]
+    if not total:
         st.warning("Aucun patient ne correspond aux critères.")
-    else:
-        st.dataframe(patients_data)
-        st.markdown(f"**{len(patients_data)} patients trouvés**")
+        return
+
+    st.dataframe(pd.DataFrame(page["items"]), hide_index=True)
+    n_pages = math.ceil(total / page_size)
+    col1, col2 = st.columns([1, 3])
+    col1.number_input("Page", min_value=1, max_value=n_pages, step=1, key="page_number")
+    col2.markdown(f"**{total} patients trouvés** — page {page_number} / {n_pages}")
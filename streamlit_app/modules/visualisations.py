@@ -1,126 +1,104 @@
 import streamlit as st
+import requests
 import plotly.express as px
-from collections import Counter
-
-
-@st.cache_data
-def calc_taux_avc(patients) -> dict:
-    """
-    Calcule le taux d'AVC par genre à partir d'une liste de patients.
-
-    Args:
-        patients (list of dict): Liste de dictionnaires représentant les patients.
-            Chaque dictionnaire peut contenir les clés "gender" et "stroke".
-
-    Returns:
-        dict: Un dictionnaire où chaque clé est un genre ("Male", "Female", etc.)
-              et chaque valeur est le pourcentage de patients ayant eu un AVC pour ce genre.
-
-    Remarques :
-    - La fonction utilise le caching de Streamlit (@st.cache_data) pour optimiser les performances.
-    - Si le genre d'un patient n'est pas renseigné, "Unknown" est utilisé.
+from modules.config import API_URL, MAX_SCATTER_POINTS
+
+# Bornes des catégories d'IMC (la dernière classe couvre IMC >= 35).
+IMC_EDGES = [0, 18.5, 25, 30, 35, 200]
+IMC_LABELS = ["Maigreur", "Normal", "Surpoids", "Obésité modérée", "Obésité sévère"]
+
+# Facteurs proposés pour la heatmap (libellé affiché -> colonne de l'API).
+FACTORS = {
+    "Maladie cardiaque": "heart_disease",
+    "Statut fumeur": "smoking_status",
+    "Hypertension": "hypertension",
+    "Genre": "gender",
+    "Marié(e)": "ever_married",
+    "Type d'emploi": "work_type",
+    "Milieu de vie": "Residence_type",
+}
+
+
+@st.cache_data(ttl=60)
+def fetch_risk_factors(patients_filter: dict, factors: tuple) -> dict | None:
     """
+    Récupère l'analyse des facteurs de risque pour une ou deux variables.
 
-    compteur, total = {}, {}
-    for p in patients:
-        g = p.get("gender", "Unknown")
-        compteur[g] = compteur.get(g, 0) + p.get("stroke", 0)
-        total[g] = total.get(g, 0) + 1
-    return {g: compteur[g] / total[g] * 100 for g in compteur}
-
-
-@st.cache_data
-def calc_avc_par_age(patients) -> Counter:
-    """
-    Compte le nombre de patients ayant eu un AVC par âge.
+    Envoie une requête GET vers l'endpoint `/analysis/risk-factors` de l'API, avec
+    le filtre de l'onglet Données.
 
     Args:
-        patients (list of dict): Liste de dictionnaires représentant les patients.
-            Chaque dictionnaire doit contenir les clés "age" et "stroke".
+        patients_filter (dict): Critères de `st.session_state["patients_filter"]`.
+        factors (tuple of str): Une ou deux variables catégorielles.
 
     Returns:
-        collections.Counter: Compteur des AVC par âge, uniquement pour les patients
-                             ayant eu un AVC (stroke == 1).
-
-    Remarques :
-    - Les âges des patients sans AVC sont ignorés.
-    - La fonction utilise le caching de Streamlit (@st.cache_data) pour optimiser les performances.
+        dict | None: Effectifs, taux d'AVC, risques relatifs, odds ratios et test
+                     du khi-deux par combinaison de modalités, ou None en cas
+                     d'erreur.
     """
-    return Counter(p["age"] for p in patients if p.get("stroke") == 1)
 
+    try:
+        response = requests.get(
+            f"{API_URL}/analysis/risk-factors",
+            params={**patients_filter, "factors": list(factors)},
+        )
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        st.error(f"Erreur API : {e}")
+        return None
 
-@st.cache_data
-def calc_avc_par_imc(patients) -> Counter:
-    """
-    Compte le nombre de patients ayant eu un AVC selon les catégories d'IMC.
-
-    Args:
-        patients (list of dict): Liste de dictionnaires représentant les patients.
-            Chaque dictionnaire doit contenir les clés "bmi" et "stroke".
-
-    Returns:
-        collections.Counter: Compteur des AVC par catégorie d'IMC :
-            - "Maigreur" : IMC < 18.5
-            - "Normal" : 18.5 <= IMC < 25
-            - "Surpoids" : 25 <= IMC < 30
-            - "Obésité modérée" : 30 <= IMC < 35
-            - "Obésité sévère" : IMC >= 35
 
-    Remarques :
-    - Seuls les patients ayant eu un AVC (stroke == 1) sont comptés.
-    - La fonction utilise le caching de Streamlit (@st.cache_data) pour optimiser les performances.
+@st.cache_data(ttl=60)
+def fetch_dashboard(patients_filter: dict, scatter_mode: str) -> dict | None:
     """
+    Récupère en un seul appel toutes les données des graphiques de la page.
 
-    def imc_bin(bmi):
-        if bmi < 18.5:
-            return "Maigreur"
-        elif bmi < 25:
-            return "Normal"
-        elif bmi < 30:
-            return "Surpoids"
-        elif bmi < 35:
-            return "Obésité modérée"
-        else:
-            return "Obésité sévère"
-
-    return Counter(imc_bin(p.get("bmi", 0)) for p in patients if p.get("stroke") == 1)
-
-
-@st.cache_data
-def calc_avc_maladie_tabac(patients) -> int:
-    """
-    Calcule le taux d'AVC en fonction de la présence de maladie cardiaque et du statut tabagique.
+    Envoie une requête POST vers l'endpoint `/query/batch` de l'API : le filtre de
+    l'onglet Données est appliqué une seule fois côté serveur, puis chaque
+    graphique est calculé sur la même cohorte.
 
     Args:
-        patients (list of dict): Liste de dictionnaires représentant les patients.
-            Chaque dictionnaire peut contenir les clés "heart_disease", "smoking_status" et "stroke".
+        patients_filter (dict): Critères de `st.session_state["patients_filter"]`.
+        scatter_mode (str): "Échantillon" ou "Densité" pour le nuage IMC vs Âge.
 
     Returns:
-        list of dict: Liste de dictionnaires avec les clés suivantes :
-            - "heart_disease" : 0 ou 1
-            - "smoking_status" : statut du patient ("Unknown" si non renseigné)
-            - "stroke" : pourcentage de patients ayant eu un AVC dans ce groupe
+        dict | None: Réponse de l'API (`total`, `results` dans l'ordre des
+                     sous-requêtes), ou None en cas d'erreur.
 
     Remarques :
-    - Les résultats sont regroupés par combinaison (maladie cardiaque, statut tabac).
-    - La fonction utilise le caching de Streamlit (@st.cache_data) pour optimiser les performances.
+    - La fonction utilise le caching de Streamlit (@st.cache_data) : changer de
+      page puis revenir ne relance pas la requête pendant 60 secondes.
     """
 
-    rate_data = {}
-    for p in patients:
-        key = (p.get("heart_disease", 0), p.get("smoking_status", "Unknown"))
-        if key not in rate_data:
-            rate_data[key] = {"stroke_sum": 0, "count": 0}
-        rate_data[key]["stroke_sum"] += p.get("stroke", 0)
-        rate_data[key]["count"] += 1
-    return [
+    stroke_only = {"stroke": 1}
+    queries = [
+        {"type": "group_rate", "by": ["gender"]},
+        {"type": "histogram", "column": "age", "bins": 20, "where": stroke_only},
+        {
+            "type": "histogram",
+            "column": "bmi",
+            "edges": IMC_EDGES,
+            "where": stroke_only,
+        },
         {
-            "heart_disease": k[0],
-            "smoking_status": k[1],
-            "stroke": v["stroke_sum"] / v["count"] * 100,
-        }
-        for k, v in rate_data.items()
+            "type": "sample",
+            "method": "density" if scatter_mode == "Densité" else "stratified",
+            "n": MAX_SCATTER_POINTS,
+            "bins": 40,
+            "where": stroke_only,
+        },
     ]
+    try:
+        response = requests.post(
+            f"{API_URL}/query/batch",
+            json={"filters": patients_filter, "queries": queries},
+        )
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        st.error(f"Erreur API : {e}")
+        return None
 
 
 def visualisations():
@@ -128,29 +106,48 @@ def visualisations():
     Affiche les visualisations statistiques des données patients dans l'application Streamlit.
 
     Fonctionnalités principales :
-    - Vérifie que des patients ont été sélectionnés dans `st.session_state["patients_data"]`.
-    - Crée quatre visualisations avec Plotly :
+    - Vérifie qu'une sélection a été faite dans l'onglet Données
+      (`st.session_state["patients_filter"]`).
+    - Crée cinq visualisations avec Plotly :
         1. Taux d'AVC par genre (bar chart)
         2. Nombre d'AVC par âge (bar chart)
-        3. Répartition des AVC selon les catégories d'IMC (pie chart)
-        4. Taux d'AVC selon la présence de maladie cardiaque et le statut tabagique (bar chart groupé)
+        3. Répartition des AVC selon les catégories d'IMC (bar chart)
+        4. Taux d'AVC selon deux facteurs au choix (heatmap, par défaut maladie
+           cardiaque et statut tabagique), avec risques relatifs, odds ratios et
+           test du khi-deux
+        5. IMC vs Âge des patients ayant eu un AVC (échantillon ou densité)
     - Affiche les graphiques directement dans l'application Streamlit.
     - Si aucun patient n'est sélectionné, affiche un message d'information.
 
     Remarques :
-    - Les calculs utilisent les fonctions `calc_taux_avc`, `calc_avc_par_age`,
-      `calc_avc_par_imc` et `calc_avc_maladie_tabac` avec caching pour optimiser les performances.
+    - Toutes les agrégations sont calculées par l'API : une seule requête pour les
+      graphiques (`fetch_dashboard`), plus l'analyse des facteurs de risque
+      (`fetch_risk_factors`). Seuls des résultats agrégés ou bornés transitent,
+      quelle que soit la taille de la cohorte.
     - Les graphiques sont interactifs grâce à Plotly.
     """
 
     st.header("Visualisations")
-    patients_data = st.session_state.get("patients_data", [])
-    if not patients_data:
+    patients_filter = st.session_state.get("patients_filter")
+    if patients_filter is None:
         st.info("Veuillez d'abord sélectionner des patients dans l'onglet Données.")
         return
 
+    mode = st.radio(
+        "Affichage du nuage IMC vs Âge",
+        ["Échantillon", "Densité"],
+        horizontal=True,
+    )
+    dashboard = fetch_dashboard(patients_filter, mode)
+    if dashboard is None:
+        return
+    if not dashboard["total"]:
+        st.info("Aucun patient ne correspond à la sélection de l'onglet Données.")
+        return
+    by_gender, ages, imc, scatter = dashboard["results"]
+
     # --- 1. Taux d'AVC par genre (bar chart horizontal)
-    taux_avc = calc_taux_avc(patients_data)
+    taux_avc = {g["gender"]: g["rate"] * 100 for g in by_gender["groups"]}
     fig1 = px.bar(
         {"Genre": list(taux_avc.keys()), "Taux d'AVC (%)": list(taux_avc.values())},
         x="Taux d'AVC (%)",
@@ -163,17 +160,20 @@ def visualisations():
     st.plotly_chart(fig1)
 
     # --- 2. Nombre d'AVC par âge (histogramme)
-    ages = [p["age"] for p in patients_data if p.get("stroke") == 1]
-    fig2 = px.histogram(
-        ages,
-        nbins=20,
-        labels={"value": "Âge", "count": "Nombre d'AVC"},
+    edges = ages["edges"]
+    fig2 = px.bar(
+        x=[(a + b) / 2 for a, b in zip(edges[:-1], edges[1:])],
+        y=ages["counts"],
+        labels={"x": "Âge", "y": "Nombre d'AVC"},
         title="Distribution des AVC par âge",
     )
+    fig2.update_traces(width=edges[1] - edges[0])
     st.plotly_chart(fig2)
 
     # --- 3. Répartition des AVC selon IMC (bar chart)
-    imc_count = calc_avc_par_imc(patients_data)
+    imc_count = {
+        label: count for label, count in zip(IMC_LABELS, imc["counts"]) if count
+    }
     fig3 = px.bar(
         {
             "Catégorie IMC": list(imc_count.keys()),
@@ -189,55 +189,82 @@ def visualisations():
     fig3.update_traces(textposition="outside")
     st.plotly_chart(fig3)
 
-    # --- 4. AVC selon maladie cardiaque et tabac (heatmap)
-    rate_list = calc_avc_maladie_tabac(patients_data)
-
-    # Préparer les axes et la matrice des valeurs
-    smoking_statuses = sorted(list(set(d["smoking_status"] for d in rate_list)))
-    heart_diseases = [0, 1]  # 0 = pas de maladie cardiaque, 1 = maladie cardiaque
-    z_matrix = []
-
-    for hd in heart_diseases:
-        row = []
-        for ss in smoking_statuses:
-            # Chercher le taux correspondant
-            val = next(
-                (
-                    d["stroke"]
-                    for d in rate_list
-                    if d["heart_disease"] == hd and d["smoking_status"] == ss
-                ),
-                0,
+    # --- 4. Taux d'AVC selon deux facteurs de risque (heatmap)
+    col1, col2 = st.columns(2)
+    row_label = col1.selectbox("Facteur (lignes)", list(FACTORS), index=0)
+    col_label = col2.selectbox("Facteur (colonnes)", list(FACTORS), index=1)
+    if row_label == col_label:
+        st.warning("Veuillez choisir deux facteurs différents.")
+    else:
+        row_factor, col_factor = FACTORS[row_label], FACTORS[col_label]
+        analysis = fetch_risk_factors(patients_filter, (row_factor, col_factor))
+        if analysis is not None and analysis["cells"]:
+            cells = analysis["cells"]
+            rows = sorted(set(c[row_factor] for c in cells))
+            cols = sorted(set(c[col_factor] for c in cells))
+            rates = {(c[row_factor], c[col_factor]): c["rate"] * 100 for c in cells}
+            z_matrix = [[rates.get((r, k)) for k in cols] for r in rows]
+
+            fig4 = px.imshow(
+                z_matrix,
+                x=[str(k) for k in cols],
+                y=[str(r) for r in rows],
+                labels={"x": col_label, "y": row_label, "color": "Taux d'AVC (%)"},
+                color_continuous_scale="Reds",
+                text_auto=".1f",
+                title=f"Taux d'AVC selon {row_label.lower()} et {col_label.lower()}",
+            )
+            st.plotly_chart(fig4)
+
+            chi2 = analysis["chi_square"]
+            if chi2["p_value"] is not None:
+                st.caption(
+                    f"Khi-deux = {chi2['statistic']:.2f} ({chi2['dof']} ddl), "
+                    f"p = {chi2['p_value']:.3g}. Référence : "
+                    + ", ".join(f"{k} = {v}" for k, v in analysis["reference"].items())
+                )
+            st.dataframe(
+                [
+                    {
+                        row_label: c[row_factor],
+                        col_label: c[col_factor],
+                        "Patients": c["count"],
+                        "AVC": c["strokes"],
+                        "Risque relatif": c["relative_risk"],
+                        "Odds ratio": c["odds_ratio"],
+                        "IC 95 % (OR)": c["or_ci"],
+                    }
+                    for c in cells
+                ],
+                hide_index=True,
             )
-            row.append(val)
-        z_matrix.append(row)
-
-    fig4 = px.imshow(
-        z_matrix,
-        x=smoking_statuses,
-        y=["Sans maladie cardiaque", "Avec maladie cardiaque"],
-        labels={
-            "x": "Statut fumeur",
-            "y": "Maladie cardiaque",
-            "color": "Taux d'AVC (%)",
-        },
-        color_continuous_scale="Reds",
-        text_auto=True,
-        title="Taux d'AVC selon maladie cardiaque et statut tabac",
-    )
-
-    st.plotly_chart(fig4)
 
     # --- 5. Scatter IMC vs Âge pour AVC avec 2 couleurs distinctes
-    scatter_data = [p for p in patients_data if p.get("stroke") == 1]
-    fig5 = px.scatter(
-        scatter_data,
-        x="age",
-        y="bmi",
-        color="gender",
-        color_discrete_map={"Male": "blue", "Female": "red", "Unknown": "gray"},
-        labels={"age": "Âge", "bmi": "IMC", "gender": "Genre"},
-        title="IMC vs Âge des patients ayant eu un AVC",
-        hover_data=["stroke"],
-    )
-    st.plotly_chart(fig5)
+    if not scatter["total"]:
+        st.info("Aucun patient avec AVC dans la sélection.")
+    elif mode == "Densité":
+        fig5 = px.scatter(
+            scatter["bins"],
+            x="x",
+            y="y",
+            size="count",
+            color="count",
+            color_continuous_scale="Reds",
+            labels={"x": "Âge", "y": "IMC", "count": "Nombre de patients"},
+            title="IMC vs Âge des patients ayant eu un AVC (densité)",
+        )
+        st.plotly_chart(fig5)
+    else:
+        sample = scatter["points"]
+        fig5 = px.scatter(
+            sample,
+            x="age",
+            y="bmi",
+            color="gender",
+            color_discrete_map={"Male": "blue", "Female": "red", "Unknown": "gray"},
+            labels={"age": "Âge", "bmi": "IMC", "gender": "Genre"},
+            title=f"IMC vs Âge des patients ayant eu un AVC "
+            f"({len(sample)} / {scatter['total']} points)",
+            hover_data=["stroke"],
+        )
+        st.plotly_chart(fig5)
@@ -0,0 +1,164 @@
+import math
+import threading
+import time
+import weakref
+from typing import Iterable, Iterator, Optional
+
+
+class Overloaded(RuntimeError):
+    """
+    Levée lorsqu'une requête coûteuse ne peut pas être admise.
+
+    Attributes:
+        retry_after (int): Délai conseillé avant une nouvelle tentative (secondes).
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Limite le nombre de requêtes coûteuses exécutées simultanément.
+
+    Chaque requête annonce son coût estimé : en dessous de `min_cost`, elle est
+    exécutée sans réserver de place. Sinon, elle occupe une place parmi
+    `max_concurrent`. Lorsque toutes les places sont prises, elle attend au plus
+    `queue_timeout` secondes, dans une file d'au plus `max_queue` requêtes ;
+    au-delà, elle est refusée avec `Overloaded`, accompagnée d'un délai conseillé
+    calculé à partir de la durée moyenne des requêtes récentes.
+
+    Args:
+        max_concurrent (int): Nombre de requêtes exécutées simultanément
+            (0 ou moins pour désactiver le contrôle).
+        max_queue (int): Nombre maximum de requêtes en attente.
+        queue_timeout (float): Attente maximale d'une place (secondes).
+        min_cost (float): Coût en dessous duquel une requête n'est pas contrôlée.
+
+    Remarques :
+    - Les requêtes en attente bloquent un thread du serveur : `max_concurrent +
+      max_queue` doit rester inférieur au nombre de threads pour que les routes
+      non contrôlées (ex. `/patients/{id}`) gardent toujours un thread libre.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout: float,
+        min_cost: float = 0,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.min_cost = min_cost
+        self._slots = threading.BoundedSemaphore(max(max_concurrent, 1))
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiting = 0
+        self._bypassed = 0
+        # Durée moyenne (moyenne mobile exponentielle) d'une requête admise.
+        self._service_time = 0.1
+
+    def retry_after(self) -> int:
+        """Délai conseillé (secondes) pour que la file actuelle soit écoulée."""
+        with self._lock:
+            backlog = self._waiting + self._running + 1
+        slots = max(self.max_concurrent, 1)
+        return max(1, math.ceil(self._service_time * backlog / slots))
+
+    def acquire(self, cost: float = math.inf) -> Optional[float]:
+        """
+        Réserve une place, en attendant si nécessaire.
+
+        Args:
+            cost (float): Coût estimé de la requête (inconnu par défaut).
+
+        Returns:
+            float | None: Instant d'admission, à passer à `release` ; None si la
+                          requête est assez peu coûteuse pour ne pas être contrôlée.
+
+        Raises:
+            Overloaded: Si la file est pleine ou si aucune place ne s'est libérée
+                dans le délai `queue_timeout`.
+        """
+
+        if self.max_concurrent <= 0 or cost < self.min_cost:
+            with self._lock:
+                self._bypassed += 1
+            return None
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self._waiting >= self.max_queue:
+                    queued = False
+                else:
+                    self._waiting += 1
+                    queued = True
+            if not queued:
+                raise Overloaded("File d'attente pleine.", self.retry_after())
+            try:
+                admitted = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+            if not admitted:
+                raise Overloaded("Délai d'attente dépassé.", self.retry_after())
+        with self._lock:
+            self._running += 1
+        return time.perf_counter()
+
+    def release(self, started: Optional[float]) -> None:
+        """Libère la place réservée par `acquire` et met à jour la durée moyenne."""
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._running -= 1
+            self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+        self._slots.release()
+
+    def hold(self, iterator: Iterable, started: Optional[float]) -> Iterator:
+        """
+        Conserve la place réservée par `acquire` jusqu'à la fin d'un flux.
+
+        Args:
+            iterator (iterable): Corps d'une réponse en flux.
+            started (float | None): Valeur renvoyée par `acquire`.
+
+        Returns:
+            Iterator: Mêmes éléments que `iterator` ; la place est libérée à la
+                      fin du flux, ou lorsque le flux est abandonné sans avoir
+                      été parcouru (client déconnecté, par ex.).
+        """
+
+        pending = [started]
+
+        def release_once() -> None:
+            try:
+                self.release(pending.pop())
+            except IndexError:
+                pass
+
+        def stream():
+            try:
+                yield from iterator
+            finally:
+                release_once()
+
+        generator = stream()
+        weakref.finalize(generator, release_once)
+        return generator
+
+    def describe(self) -> dict:
+        """État courant : requêtes en cours, en attente et non contrôlées, limites configurées."""
+        with self._lock:
+            return {
+                "running": self._running,
+                "waiting": self._waiting,
+                "bypassed": self._bypassed,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "min_cost": self.min_cost,
+                "average_seconds": round(self._service_time, 4),
+            }
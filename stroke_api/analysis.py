@@ -0,0 +1,248 @@
+import math
+from statistics import NormalDist
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .config import ANALYSIS_CACHE_SIZE
+from .filters import filter_mask, gender_codes, merge_codes
+from .store import TableView
+
+
+def chi2_sf(statistic: float, dof: int) -> float:
+    """
+    Probabilité qu'une loi du khi-deux à `dof` degrés de liberté dépasse `statistic`.
+
+    Calculée par la fonction gamma incomplète régularisée : développement en
+    série si `x < a + 1`, fraction continue de Lentz sinon.
+    """
+
+    if statistic <= 0 or dof <= 0:
+        return 1.0
+    a, x = dof / 2, statistic / 2
+    scale = math.exp(-x + a * math.log(x) - math.lgamma(a))
+    if x < a + 1:
+        term = total = 1 / a
+        ap = a
+        while abs(term) > abs(total) * 1e-15:
+            ap += 1
+            term *= x / ap
+            total += term
+        return max(0.0, 1.0 - total * scale)
+    tiny = 1e-300
+    b = x + 1 - a
+    c, d = 1 / tiny, 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = d if abs(d) > tiny else tiny
+        c = b + an / c
+        c = c if abs(c) > tiny else tiny
+        d = 1 / d
+        h *= d * c
+        if abs(d * c - 1) < 1e-15:
+            break
+    return min(1.0, h * scale)
+
+
+def factor_codes(view: TableView, factor: str) -> tuple:
+    """
+    Codes entiers des modalités d'une variable, calculés une fois par vue
+    (et une fois par segment, voir `merge_codes`).
+
+    Returns:
+        tuple: `(codes, levels)` : code de chaque ligne (-1 si valeur manquante)
+               et modalités triées.
+    """
+
+    def factorize(segment: pd.DataFrame) -> tuple:
+        codes, levels = pd.factorize(segment[factor], sort=True)
+        return codes, [v.item() if hasattr(v, "item") else v for v in levels]
+
+    return view.memoize(
+        ("codes", factor),
+        lambda: merge_codes(view.segments(("codes", factor), factorize), sort=True),
+        ANALYSIS_CACHE_SIZE,
+    )
+
+
+def contingency(view: TableView, factors: tuple, filters: dict) -> tuple:
+    """
+    Table de contingence (effectifs et AVC) des combinaisons de modalités.
+
+    Args:
+        view (TableView): Vue des données.
+        factors (tuple of str): Une ou deux variables catégorielles.
+        filters (dict): Critères de `filter_mask` (valeurs None ignorées).
+
+    Returns:
+        tuple: `(levels, counts, strokes)` : modalités de chaque variable, puis
+               effectifs et nombres d'AVC, tableaux de forme
+               `(len(levels[0]), ...)`.
+
+    Remarques :
+    - Les codes des variables sont calculés une fois par vue ; une table se
+      réduit ensuite à deux `np.bincount` sur les lignes retenues.
+    """
+
+    codes, levels = zip(*(factor_codes(view, factor) for factor in factors))
+    shape = tuple(len(level) for level in levels)
+    combined = np.ravel_multi_index(tuple(np.maximum(code, 0) for code in codes), shape)
+    keep = np.logical_and.reduce([code >= 0 for code in codes])
+    if any(value is not None for value in filters.values()):
+        keep &= filter_mask(view.frame, **filters, genders=gender_codes(view))
+    cells = combined[keep]
+    size = int(np.prod(shape))
+    counts = np.bincount(cells, minlength=size)
+    strokes = np.bincount(
+        cells, weights=view.frame["stroke"].to_numpy()[keep], minlength=size
+    )
+    return list(levels), counts.reshape(shape), strokes.astype(np.int64).reshape(shape)
+
+
+def _ratio_ci(log_ratio, se, z):
+    return np.exp(log_ratio - z * se), np.exp(log_ratio + z * se)
+
+
+def _json(value) -> Optional[float]:
+    value = float(value)
+    return round(value, 6) if math.isfinite(value) else None
+
+
+def risk_factor_analysis(
+    view: TableView,
+    factors: tuple,
+    filters: Optional[dict] = None,
+    confidence: float = 0.95,
+) -> dict:
+    """
+    Analyse l'association entre une ou deux variables catégorielles et l'AVC.
+
+    Chaque combinaison de modalités (cellule) est comparée à une cellule de
+    référence, la plus peuplée : risque relatif et odds ratio, avec leurs
+    intervalles de confiance (méthode de Woolf, sur l'échelle logarithmique).
+    Un test du khi-deux d'indépendance porte sur l'ensemble des cellules.
+
+    Args:
+        view (TableView): Vue des données.
+        factors (tuple of str): Une ou deux variables catégorielles distinctes.
+        filters (dict, optional): Critères de `filter_mask`.
+        confidence (float): Niveau des intervalles de confiance.
+
+    Returns:
+        dict: `factors`, `total`, `strokes`, `confidence`, `reference` (modalités
+              de la cellule de référence), `cells` (pour chaque cellule non vide :
+              modalités, `count`, `strokes`, `rate`, `relative_risk`, `rr_ci`,
+              `odds_ratio`, `or_ci`) et `chi_square` (`statistic`, `dof`,
+              `p_value`).
+
+    Remarques :
+    - Si une cellule ou la référence compte zéro AVC (ou zéro non-AVC), 0,5 est
+      ajouté aux quatre effectifs de la comparaison (correction de Haldane-Anscombe).
+    - Les valeurs non définies sont renvoyées à None ; c'est le cas de tous les
+      risques relatifs et odds ratios lorsque la cohorte ne compte aucun AVC ou
+      uniquement des AVC (ex. filtre `stroke`) : aucune comparaison n'a de sens.
+    - Le résultat est mis en cache sur la vue : il est recalculé après chaque
+      ajout de patients ou compaction.
+    """
+
+    filters = filters or {}
+    return view.memoize(
+        _risk_factor_key(factors, filters, confidence),
+        lambda: _analyse(view, factors, filters, confidence),
+        ANALYSIS_CACHE_SIZE,
+    )
+
+
+def risk_factor_cached(
+    view: TableView,
+    factors: tuple,
+    filters: Optional[dict] = None,
+    confidence: float = 0.95,
+) -> bool:
+    """Indique si `risk_factor_analysis` a déjà ce résultat en cache sur la vue."""
+    return view.memoized(_risk_factor_key(factors, filters or {}, confidence))
+
+
+def _risk_factor_key(factors: tuple, filters: dict, confidence: float) -> tuple:
+    return ("risk_factors", factors, tuple(sorted(filters.items())), confidence)
+
+
+def _analyse(view: TableView, factors: tuple, filters: dict, confidence: float):
+    levels, counts, strokes = contingency(view, factors, filters)
+    index = np.argwhere(counts > 0)
+    n = counts[counts > 0].astype(float)
+    a = strokes[counts > 0].astype(float)
+    total, total_strokes = n.sum(), a.sum()
+    result = {
+        "factors": list(factors),
+        "total": int(total),
+        "strokes": int(total_strokes),
+        "confidence": confidence,
+        "reference": None,
+        "cells": [],
+        "chi_square": {"statistic": None, "dof": 0, "p_value": None},
+    }
+    if not len(n):
+        return result
+
+    # Comparaison de chaque cellule à la référence (vectorisée).
+    ref = int(np.argmax(n))
+    c, n_ref = a[ref], n[ref]
+    zero = (a == 0) | (a == n) | (c == 0) | (c == n_ref)
+    shift = np.where(zero, 0.5, 0.0)
+    a1, b1 = a + shift, n - a + shift
+    c1, d1 = c + shift, n_ref - c + shift
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_rr = np.log(a1 / (a1 + b1)) - np.log(c1 / (c1 + d1))
+        se_rr = np.sqrt(1 / a1 - 1 / (a1 + b1) + 1 / c1 - 1 / (c1 + d1))
+        log_or = np.log(a1 * d1 / (b1 * c1))
+        se_or = np.sqrt(1 / a1 + 1 / b1 + 1 / c1 + 1 / d1)
+    rr_low, rr_high = _ratio_ci(log_rr, se_rr, z)
+    or_low, or_high = _ratio_ci(log_or, se_or, z)
+
+    # Test du khi-deux d'indépendance (2 × nombre de cellules non vides).
+    p = total_strokes / total
+    expected = np.concatenate([n * p, n * (1 - p)])
+    observed = np.concatenate([a, n - a])
+    valid = expected > 0
+    statistic = float(
+        ((observed[valid] - expected[valid]) ** 2 / expected[valid]).sum()
+    )
+    dof = len(n) - 1 if 0 < p < 1 else 0
+
+    names = [
+        {f: levels[k][i] for k, (f, i) in enumerate(zip(factors, cell))}
+        for cell in index
+    ]
+    result["reference"] = names[ref]
+    result["chi_square"] = {
+        "statistic": _json(statistic) if dof else None,
+        "dof": dof,
+        "p_value": chi2_sf(statistic, dof) if dof else None,
+    }
+    comparable = 0 < total_strokes < total
+    for i, name in enumerate(names):
+        is_ref = i == ref
+        ratios = {
+            "relative_risk": 1.0 if is_ref else _json(np.exp(log_rr[i])),
+            "rr_ci": None if is_ref else [_json(rr_low[i]), _json(rr_high[i])],
+            "odds_ratio": 1.0 if is_ref else _json(np.exp(log_or[i])),
+            "or_ci": None if is_ref else [_json(or_low[i]), _json(or_high[i])],
+        }
+        if not comparable:
+            ratios = dict.fromkeys(ratios)
+        result["cells"].append(
+            {
+                **name,
+                "count": int(n[i]),
+                "strokes": int(a[i]),
+                "rate": _json(a[i] / n[i]),
+                **ratios,
+            }
+        )
+    return result
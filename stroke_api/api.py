@@ -1,8 +1,183 @@
-from fastapi import APIRouter, HTTPException
-from .filters import filter_patient, stroke_data_df
+from contextlib import contextmanager
+from typing import Annotated, Iterator, Literal, Optional
+
+import pandas as pd
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from . import export, sampling
+from .admission import AdmissionController, Overloaded
+from .analysis import risk_factor_analysis, risk_factor_cached
+from .query import (
+    admission_cost,
+    distribution,
+    distribution_groups,
+    estimate_result,
+    returned_rows,
+    run_batch,
+    sample_points,
+    summary_stats,
+)
+from .config import (
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MIN_COST,
+    ADMISSION_QUEUE_TIMEOUT,
+    DEFAULT_DATASET,
+    DISTRIBUTION_EXACT_MAX_ROWS,
+    EXPORT_CHUNK_ROWS,
+    MAX_BULK_RECORDS,
+    MAX_NEIGHBORS,
+    MAX_PAGE_SIZE,
+    MAX_RESULT_MB,
+    MAX_SAMPLE_POINTS,
+    MAX_SIMILAR_IDS,
+)
+from .filters import (
+    filter_mask,
+    gender_codes,
+    get_store,
+    page_positions,
+    registry,
+    select_patients,
+    stroke_model,
+)
+from .neighbors import similar_positions
+from .store import PatientStore, TableView
+from .schemas import (
+    BatchRequest,
+    BulkPatients,
+    MatchKey,
+    NumericColumn,
+    PatientFilters,
+    PredictRequest,
+    RiskFactor,
+    SimilarRequest,
+    SketchKey,
+    SortColumn,
+)
 
 router = APIRouter()
 
+admission = AdmissionController(
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_MIN_COST,
+)
+
+
+def dataset_store(dataset: str = DEFAULT_DATASET) -> PatientStore:
+    """
+    Dépendance commune aux routes : résout le paramètre `dataset` en stockage.
+
+    Args:
+        dataset (str): Nom du dataset (fichier `data/<dataset>.parquet`).
+
+    Returns:
+        PatientStore: Stockage du dataset, chargé à la demande par le registre.
+
+    Raises:
+        HTTPException: Erreur 404 si le dataset n'existe pas.
+    """
+
+    try:
+        return get_store(dataset)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Dataset inconnu : {dataset}")
+
+
+Store = Annotated[PatientStore, Depends(dataset_store)]
+
+
+def _acquire(
+    view: TableView, filters: dict, returned: Optional[int] = None
+) -> Optional[float]:
+    """
+    Réserve une place auprès de `admission` selon le coût estimé d'un filtre.
+
+    Args:
+        view (TableView): Vue des données.
+        filters (dict): Critères de `filter_mask`.
+        returned (int, optional): Nombre maximum de lignes renvoyées par la route
+            (voir `admission_cost`) ; toute la cohorte si None.
+
+    Returns:
+        float | None: Valeur à passer à `admission.release`.
+
+    Raises:
+        HTTPException: Erreur 429, avec l'en-tête `Retry-After`, si le serveur
+            est saturé (file d'attente pleine ou délai d'attente dépassé).
+    """
+
+    try:
+        return admission.acquire(admission_cost(view, filters, returned))
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Serveur saturé : {e} Réessayez dans {e.retry_after} s.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+@contextmanager
+def _admitted(
+    view: TableView, filters: dict, returned: Optional[int] = None
+) -> Iterator[None]:
+    """
+    Conserve une place réservée par `_acquire` le temps du bloc `with`.
+
+    Les requêtes dont le coût estimé est inférieur à `ADMISSION_MIN_COST` ne
+    sont pas contrôlées.
+    """
+
+    started = _acquire(view, filters, returned)
+    try:
+        yield
+    finally:
+        admission.release(started)
+
+
+def admit(
+    store: Store, filters: Annotated[PatientFilters, Depends()]
+) -> Iterator[None]:
+    """
+    Dépendance des routes qui renvoient toute la cohorte filtrée par `PatientFilters`.
+
+    La place éventuellement réservée (voir `_admitted`) est conservée pendant
+    l'exécution de la route, puis libérée.
+    """
+
+    with _admitted(store.view, filters.model_dump()):
+        yield
+
+
+Admitted = Depends(admit)
+
+
+def _too_large(rows: int, size: float) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Résultat trop volumineux (environ {rows} patients, "
+        f"{size / 1024 / 1024:.1f} Mo ; maximum {MAX_RESULT_MB:g} Mo). Utilisez "
+        "GET /patients/page (pagination) ou GET /patients/export (fichier en flux).",
+    )
+
+
+def check_result_size(
+    store: Store, filters: Annotated[PatientFilters, Depends()]
+) -> None:
+    """
+    Dépendance de `GET /patients/` : refuse, avant tout calcul, un résultat trop volumineux.
+
+    Raises:
+        HTTPException: Erreur 413 si la taille estimée de la réponse dépasse
+            `MAX_RESULT_MB`.
+    """
+
+    estimate = estimate_result(store.view, filters.model_dump())
+    if estimate["bytes"] > MAX_RESULT_MB * 1024 * 1024:
+        raise _too_large(estimate["rows"], estimate["bytes"])
+
 
 @router.get("/")
 def read_root() -> dict:
@@ -16,48 +191,276 @@ def read_root() -> dict:
     return {"message": "Bienvenue sur l'API Stroke Prediction !"}
 
 
-@router.get("/patients/")
+@router.get("/datasets/")
+def get_datasets() -> list[dict]:
+    """
+    Liste les datasets disponibles et leur état dans le registre.
+
+    Returns:
+        list of dict: Pour chaque dataset : nom, chargé ou non, épinglé ou non,
+                      et pour les datasets chargés, nombre de lignes et empreinte
+                      mémoire estimée.
+    """
+
+    return registry.describe()
+
+
+@router.get("/patients/", dependencies=[Depends(check_result_size), Admitted])
 def get_patients(
-    gender: str = None,
-    stroke: int = None,
-    min_age: int = None,
-    max_age: int = None,
-) -> dict:
+    store: Store,
+    filters: Annotated[PatientFilters, Depends()],
+    sort_by: Optional[SortColumn] = None,
+    order: Literal["asc", "desc"] = "asc",
+) -> list[dict] | dict:
     """
     Récupère la liste des patients filtrée selon les critères fournis.
 
     Args:
-        gender (str, optional): Filtrer par genre ("Male", "Female", etc.).
-        stroke (int, optional): Filtrer par AVC (1 pour AVC, 0 sinon).
-        min_age (int, optional): Âge minimum inclus pour le filtre.
-        max_age (int, optional): Âge maximum inclus pour le filtre.
+        store (PatientStore): Dataset interrogé (paramètre `dataset`, par défaut
+            "stroke_data").
+        filters (PatientFilters): Critères de filtrage, passés en paramètres de requête :
+            - gender (str, optional): Filtrer par genre ("Male", "Female", etc.).
+            - stroke (int, optional): Filtrer par AVC (1 pour AVC, 0 sinon).
+            - min_age (int, optional): Âge minimum inclus pour le filtre.
+            - max_age (int, optional): Âge maximum inclus pour le filtre.
+            - min_risk / max_risk (float, optional): Bornes du score `risk_score`.
+        sort_by (str, optional): Colonne de tri (ex. "risk_score").
+        order (str): Ordre du tri : "asc" (par défaut) ou "desc".
 
     Returns:
         list of dict or dict: Liste des patients correspondant aux filtres,
                               ou message si aucun patient n'est trouvé.
 
+    Raises:
+        HTTPException: Erreur 413 si la réponse dépasserait `MAX_RESULT_MB` ;
+            429 si le serveur est saturé.
+
     Remarques :
-    - Utilise la fonction `filter_patient` pour appliquer les filtres.
+    - Utilise la fonction `select_patients` pour appliquer les filtres et le tri.
+    - Chaque patient inclut son `risk_score`, calculé au chargement des données.
+    - La taille de la réponse est estimée avant le filtrage (voir
+      `GET /patients/estimate`), puis vérifiée sur le nombre exact de patients
+      avant la conversion en JSON.
     """
 
-    filtered = filter_patient(
-        gender=gender,
-        stroke=stroke,
-        min_age=min_age,
-        max_age=max_age,
+    view = store.view
+    selected = select_patients(
+        view.frame,
+        **filters.model_dump(),
+        sort_by=sort_by,
+        descending=order == "desc",
+        genders=gender_codes(view),
     )
+    size = len(selected) * view.indexes["cardinality"].row_bytes
+    if size > MAX_RESULT_MB * 1024 * 1024:
+        raise _too_large(len(selected), size)
+    filtered = selected.to_dict("records")
     if not filtered:
         return {"message": "Aucun patient trouvé."}
     return filtered
 
 
+@router.get("/patients/estimate")
+def estimate_patients(
+    store: Store, filters: Annotated[PatientFilters, Depends()]
+) -> dict:
+    """
+    Estime la taille du résultat de `GET /patients/` sans l'exécuter.
+
+    Args:
+        store (PatientStore): Dataset interrogé (paramètre `dataset`).
+        filters (PatientFilters): Mêmes critères de filtrage que `GET /patients/`.
+
+    Returns:
+        dict: `rows` (nombre estimé de patients), `bytes` (taille estimée de la
+              réponse JSON), `scanned_rows`, `max_bytes` (taille maximale
+              acceptée par `GET /patients/`) et `admission` (requêtes coûteuses
+              en cours et en attente).
+
+    Remarques :
+    - L'estimation s'appuie sur les statistiques de cardinalité construites au
+      chargement des données : elle ne parcourt pas la table et n'est pas
+      soumise au contrôle d'admission.
+    """
+
+    return {
+        **estimate_result(store.view, filters.model_dump()),
+        "max_bytes": round(MAX_RESULT_MB * 1024 * 1024),
+        "admission": admission.describe(),
+    }
+
+
+@router.get("/patients/page")
+def get_patients_page(
+    store: Store,
+    filters: Annotated[PatientFilters, Depends()],
+    sort_by: Optional[SortColumn] = None,
+    order: Literal["asc", "desc"] = "asc",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+) -> dict:
+    """
+    Récupère une page de patients filtrés et triés côté serveur.
+
+    Args:
+        store (PatientStore): Dataset interrogé (paramètre `dataset`).
+        filters (PatientFilters): Mêmes critères de filtrage que `GET /patients/`.
+        sort_by (str, optional): Colonne de tri (ex. "risk_score").
+        order (str): Ordre du tri : "asc" (par défaut) ou "desc".
+        offset (int): Rang du premier patient de la page.
+        limit (int): Nombre de patients par page (maximum `MAX_PAGE_SIZE`).
+
+    Returns:
+        dict: `total` (nombre de patients correspondant aux filtres), `offset`,
+              `limit` et `items` (patients de la page).
+
+    Remarques :
+    - L'ordre des patients est le même que celui de `GET /patients/`.
+    - Seules les lignes de la page sont converties en JSON : le coût de la
+      réponse ne dépend pas de la taille de la cohorte.
+    """
+
+    view = store.view
+    with _admitted(view, filters.model_dump(), limit):
+        df = view.frame
+        total, positions = page_positions(
+            df,
+            filter_mask(df, **filters.model_dump(), genders=gender_codes(view)),
+            sort_by,
+            order == "desc",
+            offset,
+            limit,
+        )
+        items = view.rows(positions.tolist())
+    return {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "items": items,
+    }
+
+
+@router.get("/patients/export")
+def export_patients(
+    store: Store,
+    filters: Annotated[PatientFilters, Depends()],
+    format: Literal["parquet", "csv"] = "parquet",
+    compression: Optional[Literal["zstd", "gzip"]] = None,
+) -> StreamingResponse:
+    """
+    Exporte les patients filtrés sous forme de fichier Parquet ou CSV, en flux.
+
+    Args:
+        format (str): Format du fichier : "parquet" (par défaut) ou "csv".
+        compression (str, optional): "zstd" ou "gzip". Pour Parquet, il s'agit du
+            codec interne des colonnes ; pour CSV, du flux complet.
+        store (PatientStore): Dataset interrogé (paramètre `dataset`).
+        filters (PatientFilters): Mêmes critères de filtrage que `GET /patients/`.
+
+    Returns:
+        StreamingResponse: Fichier envoyé par blocs de `EXPORT_CHUNK_ROWS` lignes.
+
+    Remarques :
+    - Mêmes filtres que `GET /patients/`.
+    - Les lignes ne sont jamais matérialisées d'un seul tenant : la mémoire
+      utilisée côté serveur est bornée par la taille d'un bloc.
+    - La place du contrôle d'admission est conservée jusqu'à la fin du flux.
+    """
+
+    view = store.view
+    started = _acquire(view, filters.model_dump())
+    try:
+        df = view.frame
+        mask = filter_mask(df, **filters.model_dump(), genders=gender_codes(view))
+    except BaseException:
+        admission.release(started)
+        raise
+    iterator = export.iter_parquet if format == "parquet" else export.iter_csv
+    filename = export.export_filename(format, compression)
+    return StreamingResponse(
+        admission.hold(iterator(df, mask, EXPORT_CHUNK_ROWS, compression), started),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/patients/sample")
+def sample_patients(
+    store: Store,
+    filters: Annotated[PatientFilters, Depends()],
+    method: Literal["stratified", "density"] = "stratified",
+    n: int = Query(1000, ge=1, le=MAX_SAMPLE_POINTS),
+    x: NumericColumn = "age",
+    y: NumericColumn = "bmi",
+    bins: int = Query(50, ge=1, le=500),
+) -> dict:
+    """
+    Retourne un nombre borné de points pour les nuages de points.
+
+    Args:
+        method (str): "stratified" pour un échantillon aléatoire stratifié par
+            `gender`/`stroke`, "density" pour des comptages sur une grille 2-D.
+        n (int): Nombre maximum de points (méthode "stratified").
+        x (str): Colonne numérique en abscisse ("age", "bmi", "avg_glucose_level").
+        y (str): Colonne numérique en ordonnée.
+        bins (int): Nombre de classes par axe (méthode "density").
+        store (PatientStore): Dataset interrogé (paramètre `dataset`).
+        filters (PatientFilters): Mêmes critères de filtrage que `GET /patients/`.
+
+    Returns:
+        dict: `total` (patients correspondant aux filtres) et, selon la méthode,
+              `points` (id, x, y, gender, stroke) ou la grille de densité.
+
+    Remarques :
+    - L'échantillonnage utilise une graine fixe (`SAMPLE_SEED`) : deux appels
+      identiques renvoient les mêmes points.
+    - La taille de la réponse ne dépend pas de la taille de la cohorte.
+    """
+
+    view = store.view
+    returned = n if method == "stratified" else bins**2
+    with _admitted(view, filters.model_dump(), returned):
+        df = view.frame
+        mask = filter_mask(df, **filters.model_dump(), genders=gender_codes(view))
+        return sample_points(df[mask], method, n, x, y, bins)
+
+
+@router.get("/patients/histogram")
+def histogram_patients(
+    store: Store,
+    filters: Annotated[PatientFilters, Depends()],
+    column: NumericColumn = "age",
+    bins: int = Query(20, ge=1, le=500),
+) -> dict:
+    """
+    Retourne l'histogramme d'une colonne numérique pour les patients filtrés.
+
+    Args:
+        column (str): Colonne numérique ("age", "bmi", "avg_glucose_level").
+        bins (int): Nombre de classes.
+        store (PatientStore): Dataset interrogé (paramètre `dataset`).
+        filters (PatientFilters): Mêmes critères de filtrage que `GET /patients/`.
+
+    Returns:
+        dict: `total`, bornes (`edges`) et effectifs (`counts`) des classes.
+    """
+
+    view = store.view
+    with _admitted(view, filters.model_dump(), bins):
+        df = view.frame
+        mask = filter_mask(df, **filters.model_dump(), genders=gender_codes(view))
+        values = df[column].to_numpy()[mask]
+        return {"total": len(values), **sampling.histogram(values, bins)}
+
+
 @router.get("/patients/{patient_id}")
-def get_patient_by_id(patient_id: int) -> dict:
+def get_patient_by_id(patient_id: int, store: Store) -> dict:
     """
     Récupère un patient selon son ID.
 
     Args:
         patient_id (int): Identifiant unique du patient.
+        store (PatientStore): Dataset interrogé (paramètre `dataset`).
 
     Returns:
         dict: Dictionnaire représentant le patient correspondant à l'ID.
@@ -66,21 +469,164 @@ def get_patient_by_id(patient_id: int) -> dict:
         HTTPException: Erreur 404 si aucun patient avec l'ID fourni n'est trouvé.
 
     Remarques :
-    - Retourne le premier (et unique) enregistrement correspondant à l'ID.
+    - La recherche passe par l'index des identifiants du dataset
+      (snapshot et ajouts récents), sans parcourir la table.
     """
 
-    patient = stroke_data_df[stroke_data_df["id"] == patient_id]
-    if patient.empty:
+    patient = store.get(patient_id)
+    if patient is None:
         raise HTTPException(status_code=404, detail="Patient non trouvé")
-    return patient.to_dict("records")[0]
-    # Gérer le cas où l'id de patient passé en paramètre n'existe pas
+    return patient
+
+
+def _similar(store: PatientStore, patient_id: int, k: int, match: list) -> list[dict]:
+    located = store.locate(patient_id)
+    if located is None:
+        raise HTTPException(status_code=404, detail="Patient non trouvé")
+    view, position = located
+    neighbors = similar_positions(view, position, k, match)
+    rows = view.rows([pos for pos, _ in neighbors])
+    return [
+        {**row, "distance": round(distance, 6)}
+        for row, (_, distance) in zip(rows, neighbors)
+    ]
+
+
+@router.get("/patients/{patient_id}/similar")
+def get_similar_patients(
+    patient_id: int,
+    store: Store,
+    k: int = Query(5, ge=1, le=MAX_NEIGHBORS),
+    match: list[MatchKey] = Query([]),
+) -> list[dict]:
+    """
+    Retourne les `k` patients les plus proches d'un patient donné.
+
+    Args:
+        patient_id (int): Identifiant du patient de référence.
+        store (PatientStore): Dataset interrogé (paramètre `dataset`).
+        k (int): Nombre de voisins à retourner.
+        match (list of str, optional): Variables devant être identiques à celles du
+            patient de référence ("gender", "hypertension", "heart_disease").
+
+    Returns:
+        list of dict: Patients voisins, du plus proche au plus éloigné, avec leur
+                      `distance` au patient de référence.
+
+    Raises:
+        HTTPException: Erreur 404 si aucun patient avec l'ID fourni n'est trouvé.
+
+    Remarques :
+    - La distance est euclidienne sur `age`, `bmi` et `avg_glucose_level`
+      centrés-réduits.
+    - La recherche utilise l'index k-d construit au chargement des données,
+      partitionné par `gender`/`hypertension`/`heart_disease`.
+    """
+
+    return _similar(store, patient_id, k, match)
+
+
+@router.post("/patients/similar")
+def get_similar_patients_batch(payload: SimilarRequest, store: Store) -> dict:
+    """
+    Recherche les plus proches voisins de plusieurs patients en une requête.
+
+    Args:
+        payload (SimilarRequest): Identifiants des patients, `k` et variables d'appariement.
+        store (PatientStore): Dataset interrogé (paramètre `dataset`).
+
+    Returns:
+        dict: `results` (voisins indexés par identifiant, en clé texte) et
+              `not_found` (identifiants inconnus).
+
+    Raises:
+        HTTPException: Erreur 413 si trop d'identifiants ou de voisins sont demandés.
+    """
+
+    if len(payload.ids) > MAX_SIMILAR_IDS or payload.k > MAX_NEIGHBORS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Maximum {MAX_SIMILAR_IDS} patients et {MAX_NEIGHBORS} voisins.",
+        )
+    results, not_found = {}, []
+    for patient_id in payload.ids:
+        try:
+            results[str(patient_id)] = _similar(
+                store, patient_id, payload.k, payload.match
+            )
+        except HTTPException:
+            not_found.append(patient_id)
+    return {"results": results, "not_found": not_found}
+
+
+@router.post("/patients/bulk", status_code=201)
+def add_patients_bulk(payload: BulkPatients, dataset: str = DEFAULT_DATASET) -> dict:
+    """
+    Ajoute un lot de nouveaux patients.
+
+    Args:
+        payload (BulkPatients): Lot de patients à insérer.
+        dataset (str): Nom du dataset cible.
+
+    Returns:
+        dict: Nombre de patients insérés, identifiants rejetés (déjà existants
+              ou dupliqués dans le lot) et version des données après insertion.
+
+    Raises:
+        HTTPException: Erreur 413 si le lot dépasse `MAX_BULK_RECORDS`, 404 si le
+            dataset n'existe pas.
+
+    Remarques :
+    - Les patients sont ajoutés au delta en mémoire et sont visibles immédiatement
+      par toutes les routes de lecture.
+    - Le delta est fusionné périodiquement dans le fichier Parquet par la tâche
+      de compaction lancée au démarrage de l'application.
+    - Si le dataset vient d'être évincé du registre, il est rechargé avant l'ajout.
+    """
+
+    if len(payload.records) > MAX_BULK_RECORDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lot trop volumineux (maximum {MAX_BULK_RECORDS} patients).",
+        )
+    try:
+        return registry.append(
+            dataset, [record.model_dump() for record in payload.records]
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Dataset inconnu : {dataset}")
+
+
+@router.post("/predict")
+def predict(payload: PredictRequest) -> dict:
+    """
+    Calcule le risque d'AVC d'un lot de patients avec le modèle pré-entraîné.
+
+    Args:
+        payload (PredictRequest): Variables explicatives des patients à évaluer.
+
+    Returns:
+        dict: `risk_scores`, la probabilité d'AVC de chaque patient, dans l'ordre
+              de la requête.
+
+    Remarques :
+    - Le modèle (régression logistique) est chargé une seule fois au démarrage
+      depuis `data/stroke_model.npz`.
+    - Le lot est évalué en une seule opération matricielle NumPy.
+    """
+
+    df = pd.DataFrame([record.model_dump() for record in payload.records])
+    return {"risk_scores": stroke_model.predict_proba(df).round(6).tolist()}
 
 
 @router.get("/stats/")
-def get_stats() -> dict:
+def get_stats(store: Store) -> dict:
     """
     Récupère les statistiques globales des patients.
 
+    Args:
+        store (PatientStore): Dataset interrogé (paramètre `dataset`).
+
     Returns:
         dict: Dictionnaire contenant les statistiques suivantes :
             - total_patients (int): Nombre total de patients
@@ -90,19 +636,148 @@ def get_stats() -> dict:
             - average_age (float): Âge moyen des patients, arrondi à 2 décimales
 
     Remarques :
-    - Les calculs sont réalisés sur l'ensemble des patients présents dans `stroke_data_df`.
+    - Les calculs sont réalisés sur l'ensemble des patients présents dans le dataset.
     """
 
-    total = len(stroke_data_df)
-    stroke_true = int(stroke_data_df["stroke"].sum())
-    stroke_false = total - stroke_true
-    gender_count = stroke_data_df["gender"].value_counts().to_dict()
-    avg_age = float(stroke_data_df["age"].mean())
+    view = store.view
+    with _admitted(view, {}, len(view.indexes["cardinality"].cells)):
+        return summary_stats(view.frame, gender_codes(view))
 
-    return {
-        "total_patients": total,
-        "stroke_true": stroke_true,
-        "stroke_false": stroke_false,
-        "gender_distribution": gender_count,
-        "average_age": round(avg_age, 2),
-    }
+
+@router.get("/stats/distribution")
+def get_distribution(
+    store: Store,
+    filters: Annotated[PatientFilters, Depends()],
+    column: NumericColumn = "age",
+    group_by: list[SketchKey] = Query([]),
+    quantiles: list[float] = Query([0.05, 0.25, 0.5, 0.75, 0.95]),
+    mode: Literal["auto", "exact", "sketch"] = "auto",
+) -> dict:
+    """
+    Retourne la distribution d'une colonne numérique : quantiles, moyenne, min et max.
+
+    Args:
+        store (PatientStore): Dataset interrogé (paramètre `dataset`).
+        filters (PatientFilters): Mêmes critères de filtrage que `GET /patients/`.
+        column (str): "age", "bmi" ou "avg_glucose_level".
+        group_by (list of str, optional): Regroupement par "gender", "stroke",
+            "hypertension" et/ou "heart_disease".
+        quantiles (list of float): Quantiles demandés, entre 0 et 1 (par défaut
+            5 %, 25 %, médiane, 75 % et 95 %).
+        mode (str): "exact", "sketch" (résumés pré-calculés) ou "auto" (exact
+            pour les groupes d'au plus `DISTRIBUTION_EXACT_MAX_ROWS` patients).
+
+    Returns:
+        dict: `column` et `groups` : pour chaque groupe non vide, ses modalités,
+              `count`, `mean`, `min`, `max`, `quantiles`, le `mode` utilisé et
+              `rank_error`, la borne de l'erreur de rang des quantiles (fraction
+              de `count`, 0 en mode exact).
+
+    Raises:
+        HTTPException: Erreur 400 si un quantile est hors de [0, 1], ou si le mode
+            "sketch" est demandé avec un filtre d'âge ou de score de risque.
+
+    Remarques :
+    - Les résumés sont construits au chargement des données pour chaque cellule
+      `gender` × `stroke` × `hypertension` × `heart_disease`, puis fusionnés à la
+      requête : l'erreur de rang est au plus d'environ 1/512 de l'effectif du groupe.
+    - Les filtres d'âge ou de score de risque imposent le calcul exact.
+    """
+
+    if not quantiles or any(not 0 <= q <= 1 for q in quantiles):
+        raise HTTPException(
+            status_code=400, detail="Les quantiles doivent être compris entre 0 et 1."
+        )
+    view = store.view
+    group_by = tuple(dict.fromkeys(group_by))
+    try:
+        with _admitted(view, filters.model_dump(), distribution_groups(view, group_by)):
+            result = distribution(
+                view,
+                column,
+                quantiles,
+                group_by,
+                filters.model_dump(),
+                mode,
+                DISTRIBUTION_EXACT_MAX_ROWS,
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"column": column, **result}
+
+
+@router.get("/analysis/risk-factors")
+def analyse_risk_factors(
+    store: Store,
+    filters: Annotated[PatientFilters, Depends()],
+    factors: list[RiskFactor] = Query(..., min_length=1, max_length=2),
+    confidence: float = Query(0.95, gt=0, lt=1),
+) -> dict:
+    """
+    Mesure l'association entre une ou deux variables catégorielles et l'AVC.
+
+    Args:
+        store (PatientStore): Dataset interrogé (paramètre `dataset`).
+        filters (PatientFilters): Mêmes critères de filtrage que `GET /patients/`.
+        factors (list of str): Une ou deux variables distinctes parmi "gender",
+            "hypertension", "heart_disease", "ever_married", "work_type",
+            "Residence_type" et "smoking_status".
+        confidence (float): Niveau des intervalles de confiance (0.95 par défaut).
+
+    Returns:
+        dict: Pour chaque combinaison de modalités : effectif, nombre et taux
+              d'AVC, risque relatif et odds ratio par rapport à la combinaison la
+              plus fréquente (`reference`), avec intervalles de confiance ; et
+              le test du khi-deux d'indépendance (`chi_square`).
+
+    Raises:
+        HTTPException: Erreur 400 si la même variable est demandée deux fois.
+
+    Remarques :
+    - Les codes des modalités et les résultats sont mis en cache par version
+      des données : explorer différentes combinaisons ne relit pas la table.
+    - Un résultat déjà en cache est renvoyé sans passer par le contrôle
+      d'admission.
+    """
+
+    if len(set(factors)) != len(factors):
+        raise HTTPException(status_code=400, detail="Variables en double.")
+    view, factors = store.view, tuple(factors)
+    if risk_factor_cached(view, factors, filters.model_dump(), confidence):
+        return risk_factor_analysis(view, factors, filters.model_dump(), confidence)
+    # Quelques cellules par modalité : le coût est celui du parcours de la table.
+    with _admitted(view, filters.model_dump(), 0):
+        return risk_factor_analysis(view, factors, filters.model_dump(), confidence)
+
+
+@router.post("/query/batch")
+def query_batch(payload: BatchRequest, store: Store) -> dict:
+    """
+    Évalue plusieurs sous-requêtes sur une cohorte commune, en une seule requête.
+
+    Args:
+        payload (BatchRequest): Filtre commun (`filters`) et sous-requêtes
+            (`queries`), chacune identifiée par son `type` :
+            - "patients" : page triée (`sort_by`, `order`, `offset`, `limit`)
+            - "count" : nombre de patients
+            - "stats" : mêmes statistiques que `GET /stats/`
+            - "group_rate" : effectif et taux d'AVC par modalité de `by`
+            - "histogram" : histogramme de `column` (`bins` ou `edges`)
+            - "sample" : points bornés (mêmes paramètres que `GET /patients/sample`)
+            Chaque sous-requête peut restreindre la cohorte avec `where`.
+        store (PatientStore): Dataset interrogé (paramètre `dataset`).
+
+    Returns:
+        dict: `total` (taille de la cohorte), `version` des données et `results`,
+              dans l'ordre des sous-requêtes.
+
+    Remarques :
+    - Le filtre commun est évalué une seule fois et les colonnes utiles sont
+      extraites en une passe : les sous-requêtes ne refiltrent pas la table.
+    """
+
+    view = store.view
+    filters = payload.filters.model_dump()
+    returned = sum(returned_rows(query) for query in payload.queries)
+    with _admitted(view, filters, returned):
+        return run_batch(view, filters, payload.queries)
@@ -0,0 +1,154 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .sketches import key_tuple
+
+RANGE_COLUMNS = ("age", "risk_score")
+
+# Nombre de classes (d'effectifs égaux) des histogrammes de `RANGE_COLUMNS`.
+HISTOGRAM_SIZE = 256
+
+# Nombre de lignes sérialisées pour estimer la taille JSON moyenne d'un patient.
+ROW_SAMPLE = 256
+
+
+def _cdf(quantiles: np.ndarray, x: float, side: str) -> float:
+    """Fraction des valeurs `< x` (`side="left"`) ou `<= x` (`side="right"`)."""
+    i = int(np.searchsorted(quantiles, x, side))
+    if i == 0:
+        return 0.0
+    if i == len(quantiles):
+        return 1.0
+    low, high = quantiles[i - 1], quantiles[i]
+    if high > low:
+        within = (x - low) / (high - low)
+    else:
+        within = 1.0 if side == "right" else 0.0
+    return (i - 1 + within) / (len(quantiles) - 1)
+
+
+class CardinalityIndex:
+    """
+    Statistiques de cardinalité de la table, pour estimer la taille d'un résultat.
+
+    L'index conserve l'effectif exact de chaque combinaison `gender` × `stroke`,
+    un histogramme d'effectifs égaux (`HISTOGRAM_SIZE` classes) des colonnes de
+    `RANGE_COLUMNS` et la taille JSON moyenne d'un patient.
+
+    Attributes:
+        cells (list of tuple): Valeurs `(gender, stroke)` de chaque cellule.
+        counts (np.ndarray): Effectif de chaque cellule.
+        quantiles (dict): Par colonne, bornes des classes de l'histogramme
+            (`HISTOGRAM_SIZE + 1` valeurs croissantes, vide si la table l'est).
+        row_bytes (float): Taille moyenne d'un patient sérialisé en JSON (octets).
+    """
+
+    def __init__(
+        self, cells: list, counts: np.ndarray, quantiles: dict, row_bytes: float
+    ):
+        self.cells = [tuple(cell) for cell in cells]
+        self.counts = counts
+        self.quantiles = quantiles
+        self.row_bytes = row_bytes
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "CardinalityIndex":
+        """
+        Construit l'index sur une table de patients.
+
+        Args:
+            df (pd.DataFrame): Patients, avec `gender`, `stroke` et `RANGE_COLUMNS`.
+
+        Returns:
+            CardinalityIndex: Index construit.
+        """
+
+        sizes = df.groupby(["gender", "stroke"], sort=True).size()
+        quantiles = {}
+        for column in RANGE_COLUMNS:
+            values = df[column].to_numpy(dtype=float)
+            values = values[~np.isnan(values)]
+            quantiles[column] = (
+                np.quantile(values, np.linspace(0, 1, HISTOGRAM_SIZE + 1))
+                if len(values)
+                else np.zeros(0)
+            )
+        sample = df.iloc[:ROW_SAMPLE]
+        row_bytes = (
+            (len(sample.to_json(orient="records")) - 1) / len(sample)
+            if len(sample)
+            else 0.0
+        )
+        return cls(
+            [key_tuple(key) for key in sizes.index],
+            sizes.to_numpy(dtype=np.int64),
+            quantiles,
+            row_bytes,
+        )
+
+    def to_arrays(self) -> tuple:
+        """
+        Exporte l'index sous forme de tableaux NumPy et de métadonnées JSON.
+
+        Returns:
+            tuple: `(arrays, meta)`, relu par `from_arrays`.
+        """
+
+        arrays = {"counts": self.counts}
+        for column in RANGE_COLUMNS:
+            arrays[f"{column}_quantiles"] = self.quantiles[column]
+        meta = {
+            "cells": [list(cell) for cell in self.cells],
+            "row_bytes": self.row_bytes,
+        }
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, meta: dict) -> "CardinalityIndex":
+        """Reconstruit l'index à partir de la sortie de `to_arrays`."""
+        return cls(
+            meta["cells"],
+            arrays["counts"],
+            {column: arrays[f"{column}_quantiles"] for column in RANGE_COLUMNS},
+            meta["row_bytes"],
+        )
+
+    def nbytes(self) -> int:
+        """Taille de l'index en mémoire (octets)."""
+        return self.counts.nbytes + sum(q.nbytes for q in self.quantiles.values())
+
+    def count(self, gender: Optional[str] = None, stroke: Optional[int] = None) -> int:
+        """Nombre exact de patients correspondant aux critères (`gender` insensible à la casse)."""
+        return int(
+            sum(
+                count
+                for (cell_gender, cell_stroke), count in zip(self.cells, self.counts)
+                if (gender is None or str(cell_gender).lower() == gender.lower())
+                and (stroke is None or cell_stroke == stroke)
+            )
+        )
+
+    def fraction(
+        self, column: str, low: Optional[float] = None, high: Optional[float] = None
+    ) -> float:
+        """
+        Estime la fraction des patients dont `column` est dans `[low, high]`.
+
+        Args:
+            column (str): Colonne de `RANGE_COLUMNS`.
+            low (float, optional): Borne inférieure incluse (aucune si None).
+            high (float, optional): Borne supérieure incluse (aucune si None).
+
+        Returns:
+            float: Fraction estimée, entre 0 et 1 (interpolation linéaire dans
+                   les classes de l'histogramme).
+        """
+
+        quantiles = self.quantiles[column]
+        if not len(quantiles):
+            return 0.0
+        below = 0.0 if low is None else _cdf(quantiles, low, "left")
+        upto = 1.0 if high is None else _cdf(quantiles, high, "right")
+        return max(0.0, upto - below)
@@ -0,0 +1,79 @@
+# config.py
+import os
+
+# Intervalle (en secondes) entre deux compactions du delta en un nouveau Parquet.
+# Une valeur <= 0 désactive la compaction en tâche de fond.
+COMPACTION_INTERVAL_SECONDS = float(os.getenv("STROKE_COMPACTION_INTERVAL", "60"))
+
+# Nombre maximum d'enregistrements acceptés par appel à POST /patients/bulk.
+MAX_BULK_RECORDS = int(os.getenv("STROKE_MAX_BULK_RECORDS", "10000"))
+
+# Exécution parallèle des filtres et agrégats : nombre de threads (1 pour
+# désactiver), taille des blocs de lignes, et taille de table en dessous de
+# laquelle le calcul reste séquentiel.
+PARALLEL_WORKERS = int(os.getenv("STROKE_PARALLEL_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_CHUNK_ROWS = int(os.getenv("STROKE_PARALLEL_CHUNK_ROWS", "262144"))
+PARALLEL_MIN_ROWS = int(os.getenv("STROKE_PARALLEL_MIN_ROWS", "500000"))
+
+# Nombre de lignes par bloc (et par groupe de lignes Parquet) lors des exports.
+EXPORT_CHUNK_ROWS = int(os.getenv("STROKE_EXPORT_CHUNK_ROWS", "50000"))
+
+# Graine utilisée pour l'échantillonnage des nuages de points (résultats stables).
+SAMPLE_SEED = int(os.getenv("STROKE_SAMPLE_SEED", "42"))
+
+# Taille maximale d'une page de GET /patients/page.
+MAX_PAGE_SIZE = int(os.getenv("STROKE_MAX_PAGE_SIZE", "500"))
+
+# Nombre maximum de sous-requêtes par appel à POST /query/batch.
+MAX_BATCH_QUERIES = int(os.getenv("STROKE_MAX_BATCH_QUERIES", "20"))
+
+# En mode "auto", /stats/distribution calcule les quantiles exacts des groupes
+# d'au plus ce nombre de patients, et utilise les résumés au-delà.
+DISTRIBUTION_EXACT_MAX_ROWS = int(
+    os.getenv("STROKE_DISTRIBUTION_EXACT_MAX_ROWS", "2000")
+)
+
+# Nombre de résultats de /analysis/risk-factors conservés par version des données.
+ANALYSIS_CACHE_SIZE = int(os.getenv("STROKE_ANALYSIS_CACHE_SIZE", "256"))
+
+# Contrôle d'admission des requêtes qui parcourent la table : nombre de requêtes
+# exécutées simultanément (0 pour désactiver), nombre maximum de requêtes en
+# attente et attente maximale (en secondes) avant une réponse 429. La somme des
+# deux premiers doit rester inférieure au nombre de threads du serveur (40 par
+# défaut) pour que les requêtes légères (ex. /patients/{id}) ne soient jamais
+# bloquées.
+ADMISSION_MAX_CONCURRENT = int(os.getenv("STROKE_ADMISSION_MAX_CONCURRENT", "4"))
+ADMISSION_MAX_QUEUE = int(os.getenv("STROKE_ADMISSION_MAX_QUEUE", "16"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("STROKE_ADMISSION_QUEUE_TIMEOUT", "2"))
+
+# Coût estimé (lignes parcourues + lignes retenues × `RESULT_ROW_COST`) en
+# dessous duquel une requête n'est pas soumise au contrôle d'admission.
+ADMISSION_MIN_COST = float(os.getenv("STROKE_ADMISSION_MIN_COST", "250000"))
+
+# Taille maximale (en Mo, estimée en JSON) d'une réponse de GET /patients/ ;
+# au-delà, la pagination ou l'export sont proposés (erreur 413).
+MAX_RESULT_MB = float(os.getenv("STROKE_MAX_RESULT_MB", "32"))
+
+# Nombre maximum de points renvoyés par /patients/sample.
+MAX_SAMPLE_POINTS = int(os.getenv("STROKE_MAX_SAMPLE_POINTS", "5000"))
+
+# Nombre maximum de voisins et de patients par requête de similarité.
+MAX_NEIGHBORS = int(os.getenv("STROKE_MAX_NEIGHBORS", "100"))
+MAX_SIMILAR_IDS = int(os.getenv("STROKE_MAX_SIMILAR_IDS", "1000"))
+
+# Active le cache de snapshots (table préparée + index) dans data/.cache/.
+SNAPSHOT_CACHE = os.getenv("STROKE_SNAPSHOT_CACHE", "1") != "0"
+
+# Dataset servi par défaut (fichier data/<nom>.parquet).
+DEFAULT_DATASET = os.getenv("STROKE_DEFAULT_DATASET", "stroke_data")
+
+# Budget mémoire (en Mo) des datasets chargés ; au-delà, les moins récemment
+# utilisés sont évincés.
+DATASET_MEMORY_BUDGET_MB = int(os.getenv("STROKE_DATASET_MEMORY_BUDGET_MB", "512"))
+
+# Datasets jamais évincés (séparés par des virgules).
+PINNED_DATASETS = tuple(
+    name
+    for name in os.getenv("STROKE_PINNED_DATASETS", DEFAULT_DATASET).split(",")
+    if name
+)
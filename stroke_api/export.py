@@ -0,0 +1,163 @@
+import zlib
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv",
+}
+
+
+class _ChunkSink:
+    """
+    Fichier en écriture seule qui accumule les octets écrits jusqu'au prochain `drain`.
+
+    Sert de destination au `ParquetWriter` et au flux zstd du CSV pour pouvoir
+    envoyer le fichier au fil de l'eau, bloc par bloc.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _chunks(
+    df: pd.DataFrame, mask: np.ndarray, chunk_rows: int
+) -> Iterator[pd.DataFrame]:
+    """Produit les lignes retenues par `mask`, bloc par bloc, sans copie globale."""
+    positions = np.flatnonzero(mask)
+    for start in range(0, len(positions), chunk_rows):
+        yield df.take(positions[start : start + chunk_rows])
+
+
+def parquet_schema(df: pd.DataFrame) -> pa.Schema:
+    """
+    Schéma Arrow des colonnes de `df`, sans dépendre de ses valeurs.
+
+    Déduit d'un DataFrame vide, le type d'une colonne `object` est `null` :
+    ces colonnes (textes) sont typées explicitement en `pa.string()`.
+    """
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+    return schema
+
+
+def iter_parquet(
+    df: pd.DataFrame,
+    mask: np.ndarray,
+    chunk_rows: int,
+    compression: Optional[str] = None,
+) -> Iterator[bytes]:
+    """
+    Génère un fichier Parquet par morceaux, un groupe de lignes par bloc.
+
+    Args:
+        df (pd.DataFrame): DataFrame des patients.
+        mask (np.ndarray): Masque booléen des lignes à exporter.
+        chunk_rows (int): Nombre de lignes par groupe de lignes Parquet.
+        compression (str, optional): Codec Parquet ("zstd", "gzip") ou None.
+
+    Yields:
+        bytes: Morceaux successifs du fichier Parquet.
+    """
+
+    schema = parquet_schema(df)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression=compression or "none")
+    try:
+        for chunk in _chunks(df, mask, chunk_rows):
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            writer.write_table(table, row_group_size=chunk_rows)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def iter_csv(
+    df: pd.DataFrame,
+    mask: np.ndarray,
+    chunk_rows: int,
+    compression: Optional[str] = None,
+) -> Iterator[bytes]:
+    """
+    Génère un fichier CSV par morceaux, éventuellement compressé en flux.
+
+    Args:
+        df (pd.DataFrame): DataFrame des patients.
+        mask (np.ndarray): Masque booléen des lignes à exporter.
+        chunk_rows (int): Nombre de lignes par bloc.
+        compression (str, optional): "gzip", "zstd" ou None.
+
+    Yields:
+        bytes: Morceaux successifs du fichier CSV (compressé le cas échéant).
+    """
+
+    if compression == "gzip":
+        compressor = zlib.compressobj(wbits=31)
+        compress, finish = compressor.compress, compressor.flush
+    elif compression == "zstd":
+        sink = _ChunkSink()
+        stream = pa.CompressedOutputStream(pa.PythonFile(sink, mode="w"), "zstd")
+
+        def compress(data: bytes) -> bytes:
+            stream.write(data)
+            return sink.drain()
+
+        def finish() -> bytes:
+            stream.close()
+            return sink.drain()
+
+    else:
+        compress, finish = (lambda data: data), (lambda: b"")
+
+    yield compress(df.iloc[:0].to_csv(index=False).encode("utf-8"))
+    for chunk in _chunks(df, mask, chunk_rows):
+        yield compress(chunk.to_csv(index=False, header=False).encode("utf-8"))
+    yield finish()
+
+
+def export_filename(fmt: str, compression: Optional[str] = None) -> str:
+    """
+    Construit le nom du fichier exporté.
+
+    Args:
+        fmt (str): "parquet" ou "csv".
+        compression (str, optional): Compression demandée.
+
+    Returns:
+        str: Nom de fichier, par ex. "patients.csv.gz" ou "patients.parquet".
+    """
+
+    name = f"patients.{fmt}"
+    if fmt == "csv" and compression == "gzip":
+        name += ".gz"
+    elif fmt == "csv" and compression == "zstd":
+        name += ".zst"
+    return name
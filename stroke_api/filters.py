@@ -1,22 +1,110 @@
 from typing import Optional
 from pathlib import Path
+import numpy as np
 import pandas as pd
+from . import parallel
+from .config import (
+    DATASET_MEMORY_BUDGET_MB,
+    DEFAULT_DATASET,
+    PINNED_DATASETS,
+    SNAPSHOT_CACHE,
+)
+from .cardinality import CardinalityIndex
+from .model import StrokeModel
+from .neighbors import SimilarityIndex
+from .sketches import QuantileSketchIndex
+from .registry import DatasetRegistry
+from .snapshot import file_hash
+from .store import PatientStore, TableView
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
-DATA_PATH = PROJECT_ROOT / "data" / "stroke_data.parquet"
+DATA_DIR = PROJECT_ROOT / "data"
+DATA_PATH = DATA_DIR / f"{DEFAULT_DATASET}.parquet"
+MODEL_PATH = DATA_DIR / "stroke_model.npz"
+CACHE_DIR = DATA_DIR / ".cache"
 
-stroke_data_df = pd.read_parquet(DATA_PATH)
+stroke_model = StrokeModel.load(MODEL_PATH)
 
 
-def get_stroke_data() -> pd.DataFrame:
+def add_risk_score(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ajoute la colonne `risk_score` (probabilité d'AVC prédite par `stroke_model`).
+
+    Args:
+        df (pd.DataFrame): DataFrame des patients.
+
+    Returns:
+        pd.DataFrame: Copie de `df` avec la colonne `risk_score`.
+    """
+    return df.assign(risk_score=stroke_model.predict_proba(df))
+
+
+MODEL_FINGERPRINT = file_hash(MODEL_PATH)
+
+
+def open_dataset(path: Path) -> PatientStore:
+    """
+    Ouvre un dataset Parquet avec la préparation et les index de l'API.
+
+    Args:
+        path (Path): Fichier Parquet du dataset.
+
+    Returns:
+        PatientStore: Stockage prêt à être interrogé (avec `risk_score`,
+                      index des identifiants, index de similarité,
+                      résumés de quantiles et statistiques de cardinalité).
+    """
+    return PatientStore(
+        path,
+        prepare=add_risk_score,
+        indexes={
+            "similarity": SimilarityIndex,
+            "sketches": QuantileSketchIndex,
+            "cardinality": CardinalityIndex,
+        },
+        cache_dir=CACHE_DIR if SNAPSHOT_CACHE else None,
+        fingerprint=MODEL_FINGERPRINT,
+    )
+
+
+registry = DatasetRegistry(
+    DATA_DIR,
+    open_dataset,
+    budget_bytes=DATASET_MEMORY_BUDGET_MB * 1024 * 1024,
+    pinned=PINNED_DATASETS,
+)
+# Le dataset par défaut est chargé (et épinglé) dès le démarrage.
+registry.get(DEFAULT_DATASET)
+
+
+def get_store(dataset: str = DEFAULT_DATASET) -> PatientStore:
+    """
+    Retourne le stockage d'un dataset du registre.
+
+    Args:
+        dataset (str): Nom du dataset (fichier `data/<dataset>.parquet`).
+
+    Returns:
+        PatientStore: Stockage du dataset.
+
+    Raises:
+        KeyError: Si le dataset n'existe pas.
+    """
+    return registry.get(dataset)
+
+
+def get_stroke_data(dataset: str = DEFAULT_DATASET) -> pd.DataFrame:
     """
     Retourne une copie du DataFrame contenant les données des patients.
 
+    Args:
+        dataset (str): Nom du dataset.
+
     Returns:
-        pd.DataFrame: DataFrame complet des patients, prêt à être utilisé
-                      ou filtré sans modifier l'original.
+        pd.DataFrame: DataFrame complet des patients (snapshot + ajouts récents),
+                      prêt à être utilisé ou filtré sans modifier l'original.
     """
-    return stroke_data_df.copy()
+    return get_store(dataset).frame().copy()
 
 
 def filtred_stroke(df: pd.DataFrame, stroke: int) -> pd.DataFrame:
@@ -76,11 +164,215 @@ def filtered_age_range(df: pd.DataFrame, min_age: int, max_age: int) -> pd.DataF
     return df
 
 
+def factorize_gender(df: pd.DataFrame) -> tuple:
+    """
+    Codes entiers de la colonne `gender`.
+
+    Returns:
+        tuple: `(codes, levels)` : code de chaque ligne (-1 si valeur manquante)
+               et modalités, dans l'ordre d'apparition.
+    """
+    codes, levels = pd.factorize(df["gender"])
+    return codes, [str(level) for level in levels]
+
+
+def merge_codes(parts: list, sort: bool = False) -> tuple:
+    """
+    Réunit des codes `(codes, levels)` calculés segment par segment (voir `TableView.segments`).
+
+    Args:
+        parts (list of tuple): Codes et modalités de chaque segment, dans l'ordre.
+        sort (bool): Modalités triées (True) ou dans l'ordre d'apparition (False).
+
+    Returns:
+        tuple: `(codes, levels)` identiques à ceux calculés sur la table entière.
+    """
+    if len(parts) == 1:
+        return parts[0]
+    positions, remapped = {}, []
+    for codes, levels in parts:
+        # Le dernier élément traduit le code -1 (valeur manquante).
+        mapping = np.array(
+            [positions.setdefault(level, len(positions)) for level in levels] + [-1],
+            dtype=np.intp,
+        )
+        identity = np.array_equal(mapping[:-1], np.arange(len(levels)))
+        remapped.append(codes if identity else mapping[codes])
+    levels = list(positions)
+    codes = np.concatenate(remapped)
+    if sort:
+        order = sorted(range(len(levels)), key=levels.__getitem__)
+        if order != list(range(len(levels))):
+            rank = np.full(len(levels) + 1, -1, dtype=np.intp)
+            rank[order] = np.arange(len(levels))
+            codes = rank[codes]
+            levels = [levels[i] for i in order]
+    return codes, levels
+
+
+def gender_codes(view: TableView) -> tuple:
+    """
+    Codes de `gender` sur la table d'une vue (voir `factorize_gender`), calculés une fois par vue.
+
+    Les filtres et agrégats par genre comparent ensuite des entiers par blocs,
+    sans reconvertir la colonne de textes à chaque requête. Les codes de la base
+    et des lots déjà vus sont repris des vues précédentes (voir `merge_codes`).
+    """
+    return view.memoize(
+        ("gender_codes",),
+        lambda: merge_codes(view.segments(("gender_codes",), factorize_gender)),
+    )
+
+
+def filter_mask(
+    df: pd.DataFrame,
+    gender: Optional[str] = None,
+    stroke: Optional[int] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    min_risk: Optional[float] = None,
+    max_risk: Optional[float] = None,
+    genders: Optional[tuple] = None,
+) -> np.ndarray:
+    """
+    Calcule le masque booléen des patients correspondant aux critères.
+
+    Args:
+        df (pd.DataFrame): DataFrame des patients.
+        gender (str, optional): Genre à filtrer ("Male", "Female", etc.).
+        stroke (int, optional): Filtre AVC (1 pour AVC, 0 sinon).
+        min_age (int, optional): Âge minimum inclus pour le filtre.
+        max_age (int, optional): Âge maximum inclus pour le filtre.
+        min_risk (float, optional): Score de risque (`risk_score`) minimum inclus.
+        max_risk (float, optional): Score de risque (`risk_score`) maximum inclus.
+        genders (tuple, optional): Codes de `gender` de `df` déjà calculés
+            (voir `gender_codes`) ; à défaut, ils sont calculés sur `df`.
+
+    Returns:
+        np.ndarray: Tableau booléen de longueur `len(df)`, True pour les lignes retenues.
+
+    Remarques :
+    - Mêmes règles que `filter_patient` : la tranche d'âge n'est appliquée que si
+      `min_age` et `max_age` sont tous deux fournis.
+    - Permet de filtrer sans copier le DataFrame (export par blocs, etc.).
+    - Sur une grande table, les blocs de lignes sont évalués en parallèle
+      (voir `parallel.map_chunks`) ; les comparaisons NumPy libèrent le GIL.
+    """
+
+    codes = matches = None
+    if gender is not None:
+        codes, levels = genders if genders is not None else factorize_gender(df)
+        matches = [
+            i for i, level in enumerate(levels) if level.lower() == gender.lower()
+        ]
+    stroke_values = df["stroke"].to_numpy() if stroke is not None else None
+    age = df["age"].to_numpy() if min_age is not None and max_age is not None else None
+    risk = (
+        df["risk_score"].to_numpy()
+        if min_risk is not None or max_risk is not None
+        else None
+    )
+
+    def chunk_mask(start: int, stop: int) -> np.ndarray:
+        mask = np.ones(stop - start, dtype=bool)
+        if codes is not None:
+            mask &= np.isin(codes[start:stop], matches)
+        if stroke_values is not None:
+            mask &= stroke_values[start:stop] == stroke
+        if age is not None:
+            mask &= (age[start:stop] >= min_age) & (age[start:stop] <= max_age)
+        if min_risk is not None:
+            mask &= risk[start:stop] >= min_risk
+        if max_risk is not None:
+            mask &= risk[start:stop] <= max_risk
+        return mask
+
+    parts = parallel.map_chunks(chunk_mask, len(df))
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+def select_patients(
+    df: pd.DataFrame,
+    gender: Optional[str] = None,
+    stroke: Optional[int] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    min_risk: Optional[float] = None,
+    max_risk: Optional[float] = None,
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    genders: Optional[tuple] = None,
+) -> pd.DataFrame:
+    """
+    Filtre puis trie un DataFrame de patients.
+
+    Args:
+        df (pd.DataFrame): DataFrame des patients.
+        gender, stroke, min_age, max_age, min_risk, max_risk: Critères de
+            `filter_mask`.
+        sort_by (str, optional): Colonne de tri (ex. "risk_score").
+        descending (bool): Tri décroissant si True.
+        genders (tuple, optional): Codes de `gender` de `df` (voir `filter_mask`).
+
+    Returns:
+        pd.DataFrame: Patients retenus, triés de façon stable si `sort_by` est fourni.
+    """
+
+    df = df[
+        filter_mask(df, gender, stroke, min_age, max_age, min_risk, max_risk, genders)
+    ]
+    if sort_by is not None:
+        df = df.sort_values(sort_by, ascending=not descending, kind="stable")
+    return df
+
+
+def page_positions(
+    df: pd.DataFrame,
+    mask: np.ndarray,
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    offset: int = 0,
+    limit: int = 50,
+) -> tuple[int, np.ndarray]:
+    """
+    Calcule les positions des lignes d'une page de résultats triés.
+
+    Args:
+        df (pd.DataFrame): DataFrame des patients.
+        mask (np.ndarray): Masque booléen des lignes retenues (voir `filter_mask`).
+        sort_by (str, optional): Colonne de tri.
+        descending (bool): Tri décroissant si True.
+        offset (int): Rang du premier résultat de la page.
+        limit (int): Nombre maximum de résultats de la page.
+
+    Returns:
+        tuple: `(total, positions)` : nombre total de lignes retenues et positions
+               (dans `df`) des lignes de la page, dans l'ordre du tri.
+
+    Remarques :
+    - Seule la colonne de tri est triée, puis la page est découpée : les autres
+      colonnes ne sont lues que pour les lignes de la page.
+    - L'ordre est identique à celui de `select_patients` (tri stable).
+    """
+
+    positions = np.flatnonzero(mask)
+    if sort_by is not None:
+        keys = pd.Series(df[sort_by].to_numpy()[positions])
+        order = keys.sort_values(ascending=not descending, kind="stable").index
+        positions = positions[order.to_numpy()]
+    return len(positions), positions[offset : offset + limit]
+
+
 def filter_patient(
     gender: Optional[str] = None,
     stroke: Optional[int] = None,
     min_age: Optional[int] = None,
     max_age: Optional[int] = None,
+    min_risk: Optional[float] = None,
+    max_risk: Optional[float] = None,
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    dataset: str = DEFAULT_DATASET,
 ) -> list[dict]:
     """
     Filtre les patients selon plusieurs critères et retourne la liste des résultats.
@@ -90,6 +382,11 @@ def filter_patient(
         stroke (int, optional): Filtre AVC (1 pour AVC, 0 sinon).
         min_age (int, optional): Âge minimum inclus pour le filtre.
         max_age (int, optional): Âge maximum inclus pour le filtre.
+        min_risk (float, optional): Score de risque minimum inclus.
+        max_risk (float, optional): Score de risque maximum inclus.
+        sort_by (str, optional): Colonne de tri (ex. "risk_score").
+        descending (bool): Tri décroissant si True.
+        dataset (str): Nom du dataset interrogé.
 
     Returns:
         list of dict: Liste de dictionnaires représentant les patients filtrés,
@@ -97,17 +394,18 @@ def filter_patient(
 
     Remarques :
     - Les filtres sont appliqués uniquement si les valeurs correspondantes sont fournies.
-    - Utilise les fonctions `filtred_gender`, `filtred_stroke` et `filtered_age_range`.
-    - Le DataFrame original `stroke_data_df` n'est jamais modifié.
+    - Utilise la fonction `select_patients` pour filtrer et trier les lignes.
+    - Les données du dataset ne sont jamais modifiées.
     """
 
-    df = stroke_data_df.copy()
-
-    if gender is not None:
-        df = filtred_gender(df, gender)
-    if stroke is not None:
-        df = filtred_stroke(df, stroke)
-    if min_age is not None and max_age is not None:
-        df = filtered_age_range(df, min_age, max_age)
-
-    return df.to_dict("records")
+    return select_patients(
+        get_store(dataset).frame(),
+        gender,
+        stroke,
+        min_age,
+        max_age,
+        min_risk,
+        max_risk,
+        sort_by,
+        descending,
+    ).to_dict("records")
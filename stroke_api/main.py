@@ -1,10 +1,35 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 import pandas as pd
 import numpy as np
 from stroke_api.api import router
+from stroke_api.config import COMPACTION_INTERVAL_SECONDS
+from stroke_api.filters import registry
+from stroke_api.store import run_compaction
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lance la compaction périodique du delta des datasets chargés pendant la durée de vie de l'application.
+
+    À l'arrêt, une dernière compaction est effectuée pour ne perdre aucun ajout.
+    """
+    task = None
+    if COMPACTION_INTERVAL_SECONDS > 0:
+        task = asyncio.create_task(
+            run_compaction(registry.compact_all, COMPACTION_INTERVAL_SECONDS)
+        )
+    yield
+    if task is not None:
+        task.cancel()
+        await asyncio.to_thread(registry.compact_all)
+
 
 # Création d'un objet FastAPI
-app = FastAPI(title="Stroke Dataset API")
+app = FastAPI(title="Stroke Dataset API", lifespan=lifespan)
 
 # Inclusion des routes définies dans api.py
 app.include_router(router)
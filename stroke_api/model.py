@@ -0,0 +1,148 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_FEATURES = ("age", "avg_glucose_level", "bmi")
+BINARY_FEATURES = ("hypertension", "heart_disease")
+CATEGORICAL_FEATURES = (
+    "gender",
+    "ever_married",
+    "work_type",
+    "Residence_type",
+    "smoking_status",
+)
+FEATURE_COLUMNS = NUMERIC_FEATURES + BINARY_FEATURES + CATEGORICAL_FEATURES
+
+
+class StrokeModel:
+    """
+    Régression logistique du risque d'AVC, stockée sous forme de tableaux NumPy.
+
+    Le modèle est entraîné hors ligne (`python -m stroke_api.model`) et sauvegardé
+    dans un fichier `.npz` sans objet Python sérialisé : coefficients, ordonnée à
+    l'origine, moyennes/écarts-types des variables numériques et modalités des
+    variables catégorielles.
+
+    Attributes:
+        coef (np.ndarray): Coefficients, dans l'ordre des colonnes de `encode`.
+        intercept (float): Ordonnée à l'origine.
+        mean (np.ndarray): Moyennes des variables numériques.
+        std (np.ndarray): Écarts-types des variables numériques.
+        categories (dict): Modalités connues de chaque variable catégorielle.
+    """
+
+    def __init__(self, coef, intercept, mean, std, categories: dict):
+        self.coef = np.asarray(coef, dtype=float)
+        self.intercept = float(intercept)
+        self.mean = np.asarray(mean, dtype=float)
+        self.std = np.asarray(std, dtype=float)
+        self.categories = {
+            name: np.asarray(v, dtype=str) for name, v in categories.items()
+        }
+
+    def encode(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Transforme les patients en matrice de variables explicatives.
+
+        Args:
+            df (pd.DataFrame): Patients, avec au moins les colonnes `FEATURE_COLUMNS`.
+
+        Returns:
+            np.ndarray: Matrice (n, p) : variables numériques centrées-réduites,
+                        indicateurs binaires puis indicatrices des modalités
+                        (une modalité inconnue donne une ligne de zéros).
+        """
+
+        blocks = [
+            (df[list(NUMERIC_FEATURES)].to_numpy(dtype=float) - self.mean) / self.std,
+            df[list(BINARY_FEATURES)].to_numpy(dtype=float),
+        ]
+        for name in CATEGORICAL_FEATURES:
+            values = df[name].to_numpy(dtype=str)
+            blocks.append(values[:, None] == self.categories[name][None, :])
+        return np.hstack(blocks).astype(float)
+
+    def predict_proba(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Calcule la probabilité d'AVC de chaque patient, en une seule opération matricielle.
+
+        Args:
+            df (pd.DataFrame): Patients, avec au moins les colonnes `FEATURE_COLUMNS`.
+
+        Returns:
+            np.ndarray: Probabilités (n,) comprises entre 0 et 1.
+        """
+
+        if not len(df):
+            return np.zeros(0)
+        logits = self.encode(df) @ self.coef + self.intercept
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    @classmethod
+    def fit(cls, df: pd.DataFrame, l2: float = 1.0, n_iter: int = 25) -> "StrokeModel":
+        """
+        Entraîne le modèle par moindres carrés repondérés (méthode de Newton).
+
+        Args:
+            df (pd.DataFrame): Patients, avec `FEATURE_COLUMNS` et la cible `stroke`.
+            l2 (float): Pénalité L2 sur les coefficients (hors ordonnée à l'origine).
+            n_iter (int): Nombre maximum d'itérations.
+
+        Returns:
+            StrokeModel: Modèle entraîné.
+        """
+
+        numeric = df[list(NUMERIC_FEATURES)].to_numpy(dtype=float)
+        categories = {
+            name: np.unique(df[name].to_numpy(dtype=str))
+            for name in CATEGORICAL_FEATURES
+        }
+        model = cls(
+            np.zeros(0), 0.0, numeric.mean(axis=0), numeric.std(axis=0), categories
+        )
+        X = np.hstack([np.ones((len(df), 1)), model.encode(df)])
+        y = df["stroke"].to_numpy(dtype=float)
+        penalty = np.full(X.shape[1], l2)
+        penalty[0] = 0.0
+        weights = np.zeros(X.shape[1])
+        for _ in range(n_iter):
+            p = 1.0 / (1.0 + np.exp(-(X @ weights)))
+            gradient = X.T @ (p - y) + penalty * weights
+            hessian = (X * (p * (1 - p))[:, None]).T @ X + np.diag(penalty)
+            step = np.linalg.solve(hessian, gradient)
+            weights -= step
+            if np.abs(step).max() < 1e-8:
+                break
+        model.intercept = float(weights[0])
+        model.coef = weights[1:]
+        return model
+
+    def save(self, path: Path) -> None:
+        """Sauvegarde le modèle dans un fichier `.npz` (tableaux uniquement)."""
+        np.savez(
+            path,
+            coef=self.coef,
+            intercept=np.array(self.intercept),
+            mean=self.mean,
+            std=self.std,
+            **{f"categories_{name}": v for name, v in self.categories.items()},
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "StrokeModel":
+        """Charge un modèle sauvegardé par `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            categories = {
+                name: data[f"categories_{name}"] for name in CATEGORICAL_FEATURES
+            }
+            return cls(
+                data["coef"], data["intercept"], data["mean"], data["std"], categories
+            )
+
+
+if __name__ == "__main__":
+    data_dir = Path(__file__).resolve().parent.parent / "data"
+    model = StrokeModel.fit(pd.read_parquet(data_dir / "stroke_data.parquet"))
+    model.save(data_dir / "stroke_model.npz")
+    print(f"Modèle sauvegardé dans {data_dir / 'stroke_model.npz'}")
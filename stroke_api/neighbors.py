@@ -0,0 +1,334 @@
+import heapq
+import warnings
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ("age", "bmi", "avg_glucose_level")
+MATCH_KEYS = ("gender", "hypertension", "heart_disease")
+
+
+class KDTree:
+    """
+    Arbre k-d compact stocké dans des tableaux NumPy.
+
+    Les points sont réordonnés de sorte que chaque nœud couvre une tranche
+    contiguë `[start, end)` ; les feuilles sont parcourues de façon vectorisée.
+
+    Attributes:
+        points (np.ndarray): Points (n, d) réordonnés selon l'arbre.
+        positions (np.ndarray): Position d'origine (dans la table) de chaque point.
+        nodes (np.ndarray): Nœuds (m, 4) : `start`, `end`, `left`, `right`
+            (-1 pour une feuille).
+        bounds (np.ndarray): Boîtes englobantes (m, 2, d) des nœuds (min, max).
+    """
+
+    def __init__(
+        self,
+        points: np.ndarray,
+        positions: np.ndarray,
+        nodes: np.ndarray,
+        bounds: np.ndarray,
+    ):
+        self.points = points
+        self.positions = positions
+        self.nodes = nodes
+        self.bounds = bounds
+        # Copies en listes Python : plus rapides que NumPy pour des accès unitaires.
+        self._nodes = nodes.tolist()
+        self._lo = bounds[:, 0].tolist()
+        self._hi = bounds[:, 1].tolist()
+
+    @classmethod
+    def build(
+        cls, points: np.ndarray, positions: np.ndarray, leaf_size: int = 32
+    ) -> "KDTree":
+        """
+        Construit l'arbre en coupant à la médiane selon l'axe de plus grande étendue.
+
+        Args:
+            points (np.ndarray): Points (n, d).
+            positions (np.ndarray): Position d'origine de chaque point.
+            leaf_size (int): Nombre maximum de points par feuille.
+
+        Returns:
+            KDTree: Arbre construit.
+        """
+
+        order = np.arange(len(points))
+        nodes, bounds = [], []
+        stack = [(0, len(points), -1, 0)]
+        while stack:
+            start, end, parent, side = stack.pop()
+            node = len(nodes)
+            if parent >= 0:
+                nodes[parent][2 + side] = node
+            block = points[order[start:end]]
+            lo, hi = block.min(axis=0), block.max(axis=0)
+            nodes.append([start, end, -1, -1])
+            bounds.append((lo, hi))
+            if end - start > leaf_size:
+                axis = int(np.argmax(hi - lo))
+                mid = (end - start) // 2
+                part = np.argpartition(block[:, axis], mid)
+                order[start:end] = order[start:end][part]
+                stack.append((start + mid, end, node, 1))
+                stack.append((start, start + mid, node, 0))
+        return cls(
+            points[order],
+            np.asarray(positions)[order],
+            np.array(nodes, dtype=np.int64).reshape(-1, 4),
+            np.array(bounds, dtype=float).reshape(-1, 2, points.shape[1]),
+        )
+
+    def _min_dist2(self, node: int, point: tuple) -> float:
+        total = 0.0
+        for lo, hi, p in zip(self._lo[node], self._hi[node], point):
+            if p < lo:
+                total += (lo - p) ** 2
+            elif p > hi:
+                total += (p - hi) ** 2
+        return total
+
+    def query(self, point: np.ndarray, k: int, exclude: int = -1, best=None) -> list:
+        """
+        Recherche les `k` plus proches voisins d'un point (distance euclidienne).
+
+        Args:
+            point (np.ndarray): Point de requête (d,).
+            k (int): Nombre de voisins recherchés.
+            exclude (int): Position à ignorer (le patient de référence).
+            best (list, optional): Tas partagé `(-distance², -position)` pour fusionner
+                plusieurs arbres ; modifié sur place.
+
+        Returns:
+            list: Le tas `best`, contenant au plus `k` couples `(-distance², -position)`.
+        """
+
+        best = [] if best is None else best
+        if not self._nodes:
+            return best
+        coords = tuple(point.tolist())
+        frontier = [(self._min_dist2(0, coords), 0)]
+        while frontier:
+            bound, node = heapq.heappop(frontier)
+            if len(best) == k and bound > -best[0][0]:
+                break
+            start, end, left, right = self._nodes[node]
+            if left == -1:
+                diff = self.points[start:end] - point
+                dist2 = np.einsum("ij,ij->i", diff, diff)
+                candidates = (
+                    np.flatnonzero(dist2 <= -best[0][0])
+                    if len(best) == k
+                    else range(end - start)
+                )
+                for i in candidates:
+                    d, pos = float(dist2[i]), int(self.positions[start + i])
+                    _push(best, k, d, pos, exclude)
+                continue
+            for child in (left, right):
+                child_bound = self._min_dist2(child, coords)
+                if len(best) < k or child_bound <= -best[0][0]:
+                    heapq.heappush(frontier, (child_bound, child))
+        return best
+
+
+def _push(best: list, k: int, d: float, pos: int, exclude: int) -> None:
+    """
+    Insère un candidat dans le tas des `k` meilleurs.
+
+    À distance égale, la plus petite position l'emporte (résultats déterministes).
+    """
+    if pos == exclude:
+        return
+    if len(best) < k:
+        heapq.heappush(best, (-d, -pos))
+    elif (-d, -pos) > best[0]:
+        heapq.heapreplace(best, (-d, -pos))
+
+
+def _key(values) -> tuple:
+    return tuple(v.item() if hasattr(v, "item") else v for v in values)
+
+
+class SimilarityIndex:
+    """
+    Index de similarité : des arbres k-d partitionnés par les clés d'appariement.
+
+    Les variables `FEATURES` sont centrées-réduites avec les moyennes et écarts-types
+    de la table indexée (valeurs manquantes ignorées). Pour chaque sous-ensemble de
+    `MATCH_KEYS` (y compris vide), les patients sont partitionnés selon les valeurs
+    de ces clés : une recherche n'interroge ainsi qu'un seul arbre, quelles que
+    soient les clés demandées. Les patients dont une variable de `FEATURES` est
+    manquante (ex. `bmi`) ne figurent dans aucun arbre.
+
+    Attributes:
+        normalized (np.ndarray): Variables centrées-réduites (n, d) de la table indexée.
+        key_columns (dict): Valeurs de chaque clé de `MATCH_KEYS`, ligne par ligne.
+        trees (dict): `{clés d'appariement: {valeurs: KDTree}}`.
+    """
+
+    def __init__(self, mean, std, normalized, key_columns: dict, trees: dict):
+        self.mean = mean
+        self.std = std
+        self.normalized = normalized
+        self.key_columns = key_columns
+        self.trees = trees
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "SimilarityIndex":
+        """
+        Construit l'index sur une table de patients.
+
+        Args:
+            df (pd.DataFrame): Patients, avec `FEATURES` et `MATCH_KEYS`.
+
+        Returns:
+            SimilarityIndex: Index construit.
+        """
+
+        values = df[list(FEATURES)].to_numpy(dtype=float)
+        with warnings.catch_warnings():
+            # Colonne entièrement manquante : moyenne 0 et écart-type 1 ci-dessous.
+            warnings.simplefilter("ignore", RuntimeWarning)
+            mean = (
+                np.nanmean(values, axis=0) if len(values) else np.zeros(len(FEATURES))
+            )
+            std = np.nanstd(values, axis=0) if len(values) else np.ones(len(FEATURES))
+        mean = np.nan_to_num(mean)
+        std = np.where(std > 0, std, 1.0)
+        normalized = (values - mean) / std
+        complete = ~np.isnan(normalized).any(axis=1)
+        key_columns = {}
+        for name in MATCH_KEYS:
+            column = df[name].to_numpy()
+            key_columns[name] = column.astype(str) if column.dtype == object else column
+
+        trees = {}
+        for size in range(len(MATCH_KEYS) + 1):
+            for names in combinations(MATCH_KEYS, size):
+                trees[names] = {}
+                if not complete.any():
+                    continue
+                if not names:
+                    positions = np.flatnonzero(complete)
+                    trees[names][()] = KDTree.build(normalized[positions], positions)
+                    continue
+                groups = df.groupby(list(names), sort=True).indices
+                for value, positions in groups.items():
+                    positions = positions[complete[positions]]
+                    if not len(positions):
+                        continue
+                    value = _key(value if isinstance(value, tuple) else (value,))
+                    trees[names][value] = KDTree.build(normalized[positions], positions)
+        return cls(mean, std, normalized, key_columns, trees)
+
+    def to_arrays(self) -> tuple:
+        """
+        Exporte l'index sous forme de tableaux NumPy et de métadonnées JSON.
+
+        Returns:
+            tuple: `(arrays, meta)`, relu par `from_arrays`.
+        """
+
+        arrays = {"mean": self.mean, "std": self.std, "normalized": self.normalized}
+        for name, column in self.key_columns.items():
+            arrays[f"key_{name}"] = column
+        meta = {"trees": []}
+        for names, partition in self.trees.items():
+            for value, tree in partition.items():
+                i = len(meta["trees"])
+                meta["trees"].append([list(names), list(value)])
+                arrays[f"tree{i}_points"] = tree.points
+                arrays[f"tree{i}_positions"] = tree.positions
+                arrays[f"tree{i}_nodes"] = tree.nodes
+                arrays[f"tree{i}_bounds"] = tree.bounds
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, meta: dict) -> "SimilarityIndex":
+        """Reconstruit l'index à partir de la sortie de `to_arrays`."""
+        trees = {
+            names: {}
+            for size in range(len(MATCH_KEYS) + 1)
+            for names in combinations(MATCH_KEYS, size)
+        }
+        for i, (names, value) in enumerate(meta["trees"]):
+            trees[tuple(names)][tuple(value)] = KDTree(
+                arrays[f"tree{i}_points"],
+                arrays[f"tree{i}_positions"],
+                arrays[f"tree{i}_nodes"],
+                arrays[f"tree{i}_bounds"],
+            )
+        key_columns = {name: arrays[f"key_{name}"] for name in MATCH_KEYS}
+        return cls(
+            arrays["mean"], arrays["std"], arrays["normalized"], key_columns, trees
+        )
+
+    def normalize(self, values: np.ndarray) -> np.ndarray:
+        """Centre et réduit des valeurs (n, d) ou (d,) selon les statistiques de l'index."""
+        return (np.asarray(values, dtype=float) - self.mean) / self.std
+
+    def nbytes(self) -> int:
+        """Taille approximative de l'index en mémoire (octets)."""
+        return self.normalized.nbytes + sum(
+            tree.points.nbytes
+            + tree.positions.nbytes
+            + tree.nodes.nbytes
+            + tree.bounds.nbytes
+            for partition in self.trees.values()
+            for tree in partition.values()
+        )
+
+
+def similar_positions(view, position: int, k: int, match: list) -> list[tuple]:
+    """
+    Recherche les `k` patients les plus proches d'un patient de la vue.
+
+    Args:
+        view (TableView): Vue des données, dont l'index "similarity" est utilisé
+            pour la base ; le delta est parcouru directement.
+        position (int): Position du patient de référence.
+        k (int): Nombre de voisins.
+        match (list of str): Clés parmi `MATCH_KEYS` devant être identiques.
+
+    Returns:
+        list of tuple: Couples `(position, distance)` triés par distance croissante
+                       (distance euclidienne sur les variables centrées-réduites).
+
+    Remarques :
+    - Une variable manquante du patient de référence est remplacée par la moyenne
+      de la table ; les patients auxquels il manque une variable ne sont jamais
+      proposés comme voisins.
+    """
+
+    index = view.indexes["similarity"]
+    names = tuple(name for name in MATCH_KEYS if name in match)
+    if position < len(view.base):
+        point = index.normalized[position]
+        target = {name: index.key_columns[name][position].item() for name in MATCH_KEYS}
+    else:
+        target = view.row(position)
+        point = index.normalize([target[f] for f in FEATURES])
+    point = np.nan_to_num(point)
+
+    best = []
+    tree = index.trees[names].get(tuple(target[name] for name in names))
+    if tree is not None:
+        tree.query(point, k, exclude=position, best=best)
+
+    offset = len(view.base)
+    for batch in view.delta:
+        mask = np.ones(len(batch), dtype=bool)
+        for name in names:
+            mask &= (batch[name] == target[name]).to_numpy()
+        diff = index.normalize(batch[list(FEATURES)].to_numpy(dtype=float)) - point
+        dist2 = np.einsum("ij,ij->i", diff, diff)
+        mask &= ~np.isnan(dist2)
+        for local in np.flatnonzero(mask).tolist():
+            _push(best, k, float(dist2[local]), offset + local, position)
+        offset += len(batch)
+
+    return [(-pos, float(np.sqrt(-d))) for d, pos in sorted(best, reverse=True)]
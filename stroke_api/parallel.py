@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from .config import PARALLEL_CHUNK_ROWS, PARALLEL_MIN_ROWS, PARALLEL_WORKERS
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    """Pool de threads partagé, créé au premier calcul parallèle."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PARALLEL_WORKERS, thread_name_prefix="stroke-scan"
+            )
+        return _executor
+
+
+def chunk_ranges(n_rows: int, chunk_rows: int = PARALLEL_CHUNK_ROWS) -> list[tuple]:
+    """Découpe `[0, n_rows)` en blocs contigus `(start, stop)` d'au plus `chunk_rows` lignes."""
+    return [
+        (start, min(start + chunk_rows, n_rows))
+        for start in range(0, n_rows, chunk_rows)
+    ] or [(0, 0)]
+
+
+def map_chunks(
+    func: Callable[[int, int], object],
+    n_rows: int,
+    min_rows: int = PARALLEL_MIN_ROWS,
+    chunk_rows: int = PARALLEL_CHUNK_ROWS,
+) -> list:
+    """
+    Évalue `func(start, stop)` sur des blocs de lignes, en parallèle si la table est grande.
+
+    Args:
+        func (callable): Calcul partiel sur les lignes `[start, stop)`. Il doit
+            s'appuyer sur des noyaux NumPy/Arrow qui libèrent le GIL pour que
+            les threads s'exécutent réellement en parallèle.
+        n_rows (int): Nombre de lignes de la table.
+        min_rows (int): En dessous de ce nombre de lignes, un seul appel
+            `func(0, n_rows)` est fait, sans passer par le pool.
+        chunk_rows (int): Nombre de lignes par bloc.
+
+    Returns:
+        list: Résultats partiels, dans l'ordre des blocs.
+
+    Remarques :
+    - L'ordre des résultats ne dépend pas de l'ordre d'exécution des threads :
+      une fusion qui les parcourt dans l'ordre est donc déterministe.
+    """
+
+    if PARALLEL_WORKERS <= 1 or n_rows < min_rows:
+        return [func(0, n_rows)]
+    return list(
+        _pool().map(lambda bounds: func(*bounds), chunk_ranges(n_rows, chunk_rows))
+    )
@@ -0,0 +1,458 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from . import parallel, sampling
+from .config import SAMPLE_SEED
+from .filters import factorize_gender, filter_mask, gender_codes, page_positions
+from .sketches import SKETCH_KEYS, key_tuple, weighted_quantiles
+from .store import TableView
+
+# Colonnes lues par les critères de `PatientFilters`.
+FILTER_COLUMNS = ("gender", "stroke", "age", "risk_score")
+
+# Coût d'une ligne retenue (copie, tri, conversion en JSON), relativement à
+# celui d'une ligne parcourue par les filtres vectorisés.
+RESULT_ROW_COST = 20
+
+
+def summary_stats(df: pd.DataFrame, genders: Optional[tuple] = None) -> dict:
+    """
+    Calcule les statistiques globales d'un ensemble de patients.
+
+    Args:
+        df (pd.DataFrame): Patients, avec au moins `stroke`, `gender` et `age`.
+        genders (tuple, optional): Codes de `gender` de `df` déjà calculés
+            (voir `filters.gender_codes`) ; à défaut, ils sont calculés sur `df`.
+
+    Returns:
+        dict: `total_patients`, `stroke_true`, `stroke_false`,
+              `gender_distribution` (par effectif décroissant) et `average_age`
+              (arrondi à 2 décimales, None si aucun patient).
+
+    Remarques :
+    - Les agrégats partiels sont calculés par blocs de lignes, en parallèle sur
+      une grande table (voir `parallel.map_chunks`), puis fusionnés.
+    """
+
+    stroke = df["stroke"].to_numpy()
+    age = df["age"].to_numpy(dtype=float)
+    codes, levels = genders if genders is not None else factorize_gender(df)
+
+    def partial(start: int, stop: int) -> tuple:
+        ages = age[start:stop]
+        # Décalage de 1 : les valeurs manquantes (-1) sont comptées à part.
+        counts = np.bincount(codes[start:stop] + 1, minlength=len(levels) + 1)
+        return (
+            int(stroke[start:stop].sum()),
+            float(np.nansum(ages)),
+            int(np.count_nonzero(~np.isnan(ages))),
+            counts[1:],
+        )
+
+    # Fusion dans l'ordre des blocs : résultat indépendant de l'ordre d'exécution.
+    stroke_true, age_sum, age_count = 0, 0.0, 0
+    level_counts = np.zeros(len(levels), dtype=np.int64)
+    for strokes, ages_sum, ages_count, counts in parallel.map_chunks(partial, len(df)):
+        stroke_true += strokes
+        age_sum += ages_sum
+        age_count += ages_count
+        level_counts += counts
+    genders_count = {
+        name: int(count) for name, count in zip(levels, level_counts) if count
+    }
+
+    total = len(df)
+    return {
+        "total_patients": total,
+        "stroke_true": stroke_true,
+        "stroke_false": total - stroke_true,
+        "gender_distribution": dict(
+            sorted(genders_count.items(), key=lambda item: (-item[1], item[0]))
+        ),
+        "average_age": round(age_sum / age_count, 2) if age_count else None,
+    }
+
+
+def sample_points(
+    df: pd.DataFrame, method: str, n: int, x: str, y: str, bins: int
+) -> dict:
+    """
+    Réduit une cohorte à un nombre borné de points pour un nuage de points.
+
+    Args:
+        df (pd.DataFrame): Cohorte, avec `id`, `x`, `y`, `gender` et `stroke`.
+        method (str): "stratified" (échantillon stratifié par `gender`/`stroke`)
+            ou "density" (comptages sur une grille 2-D).
+        n (int): Nombre maximum de points (méthode "stratified").
+        x (str): Colonne en abscisse.
+        y (str): Colonne en ordonnée.
+        bins (int): Nombre de classes par axe (méthode "density").
+
+    Returns:
+        dict: `total` et, selon la méthode, `points` ou la grille de densité.
+    """
+
+    if method == "density":
+        return {"total": len(df), **sampling.binned_density(df, x, y, bins)}
+    sample = sampling.stratified_sample(df, n, seed=SAMPLE_SEED)
+    columns = list(dict.fromkeys(["id", x, y, "gender", "stroke"]))
+    return {"total": len(df), "points": sample[columns].to_dict("records")}
+
+
+def group_rates(df: pd.DataFrame, by: list[str]) -> list[dict]:
+    """
+    Calcule l'effectif et le taux d'AVC de chaque groupe.
+
+    Args:
+        df (pd.DataFrame): Cohorte, avec les colonnes `by` et `stroke`.
+        by (list of str): Variables de regroupement.
+
+    Returns:
+        list of dict: Une entrée par groupe non vide (ordre trié des modalités) :
+                      modalités, `count`, `strokes` et `rate` (proportion d'AVC).
+    """
+
+    grouped = df.groupby(list(by), sort=True, observed=True)["stroke"].agg(
+        ["size", "sum"]
+    )
+    result = []
+    for key, count, strokes in zip(grouped.index, grouped["size"], grouped["sum"]):
+        key = key if isinstance(key, tuple) else (key,)
+        result.append(
+            {
+                **{column: _scalar(value) for column, value in zip(by, key)},
+                "count": int(count),
+                "strokes": int(strokes),
+                "rate": round(float(strokes / count), 6),
+            }
+        )
+    return result
+
+
+def _scalar(value):
+    """Convertit un scalaire NumPy en type Python sérialisable en JSON."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _needed_columns(query) -> set:
+    """Colonnes de la table lues par une sous-requête."""
+    columns = set(FILTER_COLUMNS) if query.where is not None else set()
+    if query.type == "patients" and query.sort_by is not None:
+        columns.add(query.sort_by)
+    elif query.type == "stats":
+        columns.update(("stroke", "gender", "age"))
+    elif query.type == "group_rate":
+        columns.update((*query.by, "stroke"))
+    elif query.type == "histogram":
+        columns.add(query.column)
+    elif query.type == "sample":
+        columns.update(("id", query.x, query.y, "gender", "stroke"))
+    return columns
+
+
+def _evaluate(query, view: TableView, positions: np.ndarray, cohort: pd.DataFrame):
+    """Évalue une sous-requête sur la cohorte (colonnes utiles uniquement)."""
+    codes, levels = gender_codes(view)
+    if query.where is not None:
+        local = filter_mask(
+            cohort, **query.where.model_dump(), genders=(codes[positions], levels)
+        )
+        positions, cohort = positions[local], cohort[local]
+
+    if query.type == "count":
+        return {"total": len(cohort)}
+    if query.type == "stats":
+        return summary_stats(cohort, (codes[positions], levels))
+    if query.type == "group_rate":
+        return {"total": len(cohort), "groups": group_rates(cohort, query.by)}
+    if query.type == "histogram":
+        bins = query.edges if query.edges is not None else query.bins
+        values = cohort[query.column].to_numpy()
+        return {"total": len(values), **sampling.histogram(values, bins)}
+    if query.type == "sample":
+        return sample_points(
+            cohort, query.method, query.n, query.x, query.y, query.bins
+        )
+    total, page = page_positions(
+        cohort,
+        np.ones(len(cohort), dtype=bool),
+        query.sort_by,
+        query.order == "desc",
+        query.offset,
+        query.limit,
+    )
+    return {"total": total, "items": view.rows(positions[page].tolist())}
+
+
+def run_batch(view: TableView, filters: dict, queries: list) -> dict:
+    """
+    Évalue plusieurs sous-requêtes sur une même cohorte.
+
+    Args:
+        view (TableView): Vue des données, figée pour toute la requête.
+        filters (dict): Critères communs (voir `filter_mask`).
+        queries (list): Sous-requêtes (`PatientsQuery`, `CountQuery`, `StatsQuery`,
+            `GroupRateQuery`, `HistogramQuery`, `SampleQuery`).
+
+    Returns:
+        dict: `total` (taille de la cohorte), `version` des données et `results`,
+              un résultat par sous-requête dans l'ordre de la requête.
+
+    Remarques :
+    - Le masque de la cohorte est calculé une seule fois, puis seules les colonnes
+      lues par les sous-requêtes sont extraites, en une passe.
+    - Toutes les sous-requêtes voient la même version des données, même si des
+      patients sont ajoutés pendant l'évaluation.
+    """
+
+    df = view.frame
+    positions = np.flatnonzero(filter_mask(df, **filters, genders=gender_codes(view)))
+    columns = set().union(*(_needed_columns(query) for query in queries))
+    cohort = df[[c for c in df.columns if c in columns]].take(positions)
+    return {
+        "total": len(positions),
+        "version": view.version,
+        "results": [_evaluate(query, view, positions, cohort) for query in queries],
+    }
+
+
+def estimate_result(view: TableView, filters: dict) -> dict:
+    """
+    Estime, sans parcourir la table, la taille du résultat d'un filtre.
+
+    Args:
+        view (TableView): Vue des données, avec l'index "cardinality"
+            (`CardinalityIndex`).
+        filters (dict): Critères de `filter_mask`.
+
+    Returns:
+        dict: `rows` (nombre estimé de patients retenus), `bytes` (taille
+              estimée de la réponse JSON), `scanned_rows` (lignes à parcourir)
+              et `cost` (`scanned_rows + rows × RESULT_ROW_COST`, utilisé par
+              le contrôle d'admission).
+
+    Remarques :
+    - Les effectifs par `gender`/`stroke` sont exacts ; les tranches d'âge et de
+      score de risque sont estimées par histogramme, en supposant les critères
+      indépendants.
+    - Les patients ajoutés depuis la dernière compaction, absents de l'index,
+      sont comptés exactement.
+    """
+
+    index = view.indexes["cardinality"]
+    rows = float(index.count(filters.get("gender"), filters.get("stroke")))
+    if filters.get("min_age") is not None and filters.get("max_age") is not None:
+        rows *= index.fraction("age", filters["min_age"], filters["max_age"])
+    if filters.get("min_risk") is not None or filters.get("max_risk") is not None:
+        rows *= index.fraction(
+            "risk_score", filters.get("min_risk"), filters.get("max_risk")
+        )
+    rows = round(rows) + sum(
+        int(filter_mask(batch, **filters).sum()) for batch in view.delta
+    )
+    return {
+        "rows": rows,
+        "bytes": round(rows * index.row_bytes),
+        "scanned_rows": view.n_rows,
+        "cost": view.n_rows + rows * RESULT_ROW_COST,
+    }
+
+
+def admission_cost(
+    view: TableView, filters: dict, returned: Optional[int] = None
+) -> float:
+    """
+    Coût d'une requête pour le contrôle d'admission.
+
+    Args:
+        view (TableView): Vue des données.
+        filters (dict): Critères de `filter_mask`.
+        returned (int, optional): Nombre maximum de lignes renvoyées par la route
+            (taille de page, nombre de classes ou de groupes...) ; aucune limite
+            si None (toute la cohorte est renvoyée).
+
+    Returns:
+        float: `scanned_rows + min(rows, returned) × RESULT_ROW_COST`, avec les
+               valeurs de `estimate_result`.
+    """
+
+    estimate = estimate_result(view, filters)
+    if returned is None:
+        return estimate["cost"]
+    rows = min(estimate["rows"], returned)
+    return estimate["scanned_rows"] + rows * RESULT_ROW_COST
+
+
+def returned_rows(query) -> int:
+    """
+    Nombre maximum de lignes renvoyées par une sous-requête de `run_batch`.
+
+    Les résultats agrégés par modalité (`count`, `stats`, `group_rate`) ne
+    comptent que quelques lignes : leur coût est celui du parcours.
+    """
+    if query.type == "patients":
+        return query.limit
+    if query.type == "histogram":
+        return len(query.edges) - 1 if query.edges is not None else query.bins
+    if query.type == "sample":
+        return query.n if query.method == "stratified" else query.bins**2
+    return 0
+
+
+def distribution_groups(view: TableView, group_by: tuple) -> int:
+    """Nombre maximum de groupes de `distribution` (cellules des résumés de quantiles)."""
+    positions = [SKETCH_KEYS.index(name) for name in group_by]
+    cells = view.indexes["sketches"].cells
+    return len({tuple(cell[i] for i in positions) for cell in cells})
+
+
+def _describe(values: np.ndarray, quantiles: list[float]) -> dict:
+    """Statistiques exactes d'un ensemble de valeurs."""
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(float(values.mean()), 4),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "quantiles": _format(quantiles, np.quantile(values, quantiles)),
+        "mode": "exact",
+        "rank_error": 0.0,
+    }
+
+
+def _format(quantiles: list[float], values: np.ndarray) -> dict:
+    return {f"{q:g}": round(float(v), 4) for q, v in zip(quantiles, values)}
+
+
+def distribution(
+    view: TableView,
+    column: str,
+    quantiles: list[float],
+    group_by: tuple = (),
+    filters: Optional[dict] = None,
+    mode: str = "auto",
+    exact_max_rows: int = 0,
+) -> dict:
+    """
+    Calcule la distribution d'une colonne numérique, éventuellement par groupe.
+
+    Args:
+        view (TableView): Vue des données, avec l'index "sketches"
+            (`QuantileSketchIndex`).
+        column (str): Colonne de `SKETCH_COLUMNS`.
+        quantiles (list of float): Quantiles demandés, entre 0 et 1.
+        group_by (tuple of str): Clés de regroupement, parmi `SKETCH_KEYS`.
+        filters (dict, optional): Critères de `filter_mask`.
+        mode (str): "exact", "sketch" ou "auto" (exact pour les groupes d'au plus
+            `exact_max_rows` patients, résumés sinon).
+        exact_max_rows (int): Seuil du mode "auto".
+
+    Returns:
+        dict: `groups`, une entrée par groupe non vide avec ses valeurs de
+              `group_by`, `count`, `mean`, `min`, `max`, `quantiles`, le `mode`
+              utilisé et `rank_error`, la borne de l'erreur de rang (fraction de
+              `count`) des quantiles.
+
+    Raises:
+        ValueError: Si le mode "sketch" est demandé avec un filtre d'âge ou de
+            score de risque, que les résumés ne peuvent pas appliquer.
+
+    Remarques :
+    - Les patients ajoutés depuis la dernière compaction ne sont pas dans les
+      résumés : ils sont ajoutés avec un poids unitaire, sans erreur supplémentaire.
+    - Le nombre de patients, la moyenne, le minimum et le maximum sont exacts
+      dans tous les modes.
+    """
+
+    filters = filters or {}
+    df = view.frame
+    group_by = list(group_by)
+    ranged = (
+        filters.get("min_age") is not None and filters.get("max_age") is not None
+    ) or any(filters.get(name) is not None for name in ("min_risk", "max_risk"))
+    if ranged and mode == "sketch":
+        raise ValueError(
+            "Le mode sketch ne prend en charge que les filtres gender et stroke."
+        )
+    if mode == "exact" or ranged:
+        cohort = df[filter_mask(df, **filters, genders=gender_codes(view))]
+        if not group_by:
+            described = _describe(cohort[column].to_numpy(dtype=float), quantiles)
+            return {"groups": [described] if described["count"] else []}
+        return {
+            "groups": [
+                {**dict(zip(group_by, key_tuple(key))), **_describe(values, quantiles)}
+                for key, values in _grouped(cohort, group_by, column)
+            ]
+        }
+
+    index = view.indexes["sketches"]
+    cells = index.select(filters.get("gender"), filters.get("stroke"))
+    delta = df.iloc[len(view.base) :]
+    delta = delta[filter_mask(delta, **filters)]
+    positions = [SKETCH_KEYS.index(name) for name in group_by]
+
+    groups: dict[tuple, list[int]] = {}
+    for i in cells:
+        groups.setdefault(tuple(index.cells[i][p] for p in positions), []).append(i)
+    if group_by:
+        delta_groups = dict(_grouped(delta, group_by, column))
+    else:
+        delta_groups = {(): delta[column].to_numpy(dtype=float)}
+    for key in delta_groups:
+        groups.setdefault(key, [])
+
+    # Valeurs exactes de chaque groupe, calculées en une passe au premier petit groupe.
+    exact = None
+    result = []
+    for key in sorted(groups):
+        extra = delta_groups.get(key, np.zeros(0))
+        extra = extra[~np.isnan(extra)]
+        points, weights, (count, total, low, high), error_ranks = index.merge(
+            column, groups[key]
+        )
+        count += len(extra)
+        if not count:
+            continue
+        entry = dict(zip(group_by, key))
+        if mode == "auto" and count <= exact_max_rows:
+            if exact is None:
+                mask = filter_mask(df, **filters, genders=gender_codes(view))
+                cohort = df.loc[mask, [*group_by, column]]
+                exact = (
+                    dict(_grouped(cohort, group_by, column))
+                    if group_by
+                    else {(): cohort[column].to_numpy(dtype=float)}
+                )
+            entry.update(_describe(exact.get(key, np.zeros(0)), quantiles))
+            result.append(entry)
+            continue
+        points = np.concatenate([points, extra])
+        weights = np.concatenate([weights, np.ones(len(extra), dtype=np.int64)])
+        low = float(np.nanmin(np.append(extra, low)))
+        high = float(np.nanmax(np.append(extra, high)))
+        estimates = weighted_quantiles(points, weights, quantiles, low, high)
+        entry.update(
+            {
+                "count": int(count),
+                "mean": round(float((total + extra.sum()) / count), 4),
+                "min": low,
+                "max": high,
+                "quantiles": _format(quantiles, estimates),
+                "mode": "sketch",
+                "rank_error": round(float(error_ranks / count), 6),
+            }
+        )
+        result.append(entry)
+    return {"groups": result}
+
+
+def _grouped(df: pd.DataFrame, group_by: list[str], column: str):
+    """Valeurs de `column` par groupe de `group_by`, dans l'ordre trié des clés."""
+    values = df[column].to_numpy(dtype=float)
+    for key, positions in df.groupby(group_by, sort=True).indices.items():
+        yield key_tuple(key if isinstance(key, tuple) else (key,)), values[positions]
@@ -0,0 +1,174 @@
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+
+from .store import PatientStore, StoreClosedError
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetRegistry:
+    """
+    Registre des datasets servis par l'API, chargés à la demande.
+
+    Chaque fichier `<nom>.parquet` du répertoire de données est un dataset
+    nommé `<nom>`. Les datasets chargés sont conservés dans l'ordre de leur
+    dernière utilisation ; lorsque leur empreinte mémoire totale dépasse le
+    budget, les moins récemment utilisés sont évincés (après compaction de
+    leur delta), à l'exception des datasets épinglés. Le budget est vérifié à
+    chaque chargement, après chaque ajout et après chaque compaction.
+
+    Args:
+        data_dir (Path): Répertoire contenant les fichiers Parquet.
+        factory (callable): Fonction `factory(path) -> PatientStore`.
+        budget_bytes (int): Budget mémoire total des datasets chargés (octets).
+        pinned (iterable of str): Datasets jamais évincés.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path,
+        factory: Callable[[Path], PatientStore],
+        budget_bytes: int,
+        pinned=(),
+    ):
+        self.data_dir = Path(data_dir)
+        self.budget_bytes = budget_bytes
+        self.pinned = frozenset(pinned)
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._stores: OrderedDict[str, PatientStore] = OrderedDict()
+
+    def available(self) -> list[str]:
+        """Noms des datasets disponibles dans le répertoire de données."""
+        return sorted(path.stem for path in self.data_dir.glob("*.parquet"))
+
+    def get(self, name: str) -> PatientStore:
+        """
+        Retourne le stockage d'un dataset, en le chargeant si nécessaire.
+
+        Args:
+            name (str): Nom du dataset.
+
+        Returns:
+            PatientStore: Stockage du dataset.
+
+        Raises:
+            KeyError: Si aucun fichier `<name>.parquet` n'existe.
+        """
+
+        with self._lock:
+            store = self._stores.get(name)
+            if store is not None:
+                self._stores.move_to_end(name)
+                return store
+            if name not in self.available():
+                raise KeyError(name)
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Chargement hors du verrou global : les autres datasets restent servis.
+        with load_lock:
+            with self._lock:
+                store = self._stores.get(name)
+                if store is not None:
+                    self._stores.move_to_end(name)
+                    return store
+            store = self._factory(self.data_dir / f"{name}.parquet")
+            with self._lock:
+                self._stores[name] = store
+                evicted = self._evict(keep=name)
+
+        for old in evicted:
+            old.close()
+        return store
+
+    def _enforce_budget(self, keep: Optional[str] = None) -> None:
+        """Évince et ferme les datasets au-delà du budget, sauf `keep`."""
+        with self._lock:
+            evicted = self._evict(keep)
+        for old in evicted:
+            try:
+                old.close()
+            except Exception:
+                logger.exception("Compaction impossible pour %s", old.path)
+
+    def _evict(self, keep: Optional[str]) -> list[PatientStore]:
+        """Retire les datasets les moins récemment utilisés au-delà du budget."""
+        sizes = {name: store.nbytes() for name, store in self._stores.items()}
+        total = sum(sizes.values())
+        evicted = []
+        for name in list(self._stores):
+            if total <= self.budget_bytes:
+                break
+            if name == keep or name in self.pinned:
+                continue
+            evicted.append(self._stores.pop(name))
+            total -= sizes[name]
+        return evicted
+
+    def append(self, name: str, records: list[dict]) -> dict:
+        """
+        Ajoute des patients à un dataset, en rechargeant celui-ci s'il vient d'être évincé.
+
+        Args:
+            name (str): Nom du dataset.
+            records (list of dict): Patients à ajouter.
+
+        Returns:
+            dict: Résultat de `PatientStore.append`.
+        """
+
+        while True:
+            try:
+                result = self.get(name).append(records)
+            except StoreClosedError:
+                continue
+            self._enforce_budget(keep=name)
+            return result
+
+    def loaded(self) -> list[PatientStore]:
+        """Stockages actuellement chargés."""
+        with self._lock:
+            return list(self._stores.values())
+
+    def compact_all(self) -> None:
+        """
+        Compacte le delta de tous les datasets chargés.
+
+        Compaction au mieux : l'échec d'un dataset (disque plein, fichier
+        illisible...) est journalisé et n'empêche pas de compacter les suivants ;
+        son delta reste en mémoire jusqu'à la prochaine tentative.
+        """
+        for store in self.loaded():
+            try:
+                store.compact()
+            except Exception:
+                logger.exception("Compaction impossible pour %s", store.path)
+        self._enforce_budget()
+
+    def describe(self) -> list[dict]:
+        """
+        Décrit les datasets disponibles.
+
+        Returns:
+            list of dict: Pour chaque dataset : `name`, `loaded`, `pinned`, et pour
+                          les datasets chargés `rows` et `memory_bytes`.
+        """
+
+        with self._lock:
+            stores = dict(self._stores)
+        result = []
+        for name in self.available():
+            entry = {
+                "name": name,
+                "loaded": name in stores,
+                "pinned": name in self.pinned,
+            }
+            if name in stores:
+                entry["rows"] = stores[name].view.n_rows
+                entry["memory_bytes"] = stores[name].nbytes()
+            result.append(entry)
+        return result
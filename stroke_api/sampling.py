@@ -0,0 +1,157 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_COLUMNS = ("age", "bmi", "avg_glucose_level")
+
+
+def _allocate(sizes: np.ndarray, n: int) -> np.ndarray:
+    """
+    Répartit `n` tirages entre des strates proportionnellement à leur taille.
+
+    Méthode du plus fort reste ; chaque strate non vide reçoit au moins un
+    point lorsque `n` le permet, et jamais plus que sa taille.
+    """
+
+    total = sizes.sum()
+    if n >= total:
+        return sizes.copy()
+    quotas = sizes * n / total
+    counts = np.floor(quotas).astype(int)
+    if n >= np.count_nonzero(sizes):
+        counts = np.maximum(counts, (sizes > 0).astype(int))
+    remainder = n - counts.sum()
+    if remainder > 0:
+        order = np.argsort(-(quotas - counts), kind="stable")
+        for i in order:
+            if remainder == 0:
+                break
+            if counts[i] < sizes[i]:
+                counts[i] += 1
+                remainder -= 1
+    elif remainder < 0:
+        order = np.argsort(-counts, kind="stable")
+        for i in order:
+            if remainder == 0:
+                break
+            if counts[i] > 1:
+                counts[i] -= 1
+                remainder += 1
+    return counts
+
+
+def stratified_sample(
+    df: pd.DataFrame,
+    n: int,
+    by: tuple = ("gender", "stroke"),
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Tire un échantillon aléatoire stratifié d'au plus `n` lignes.
+
+    Args:
+        df (pd.DataFrame): DataFrame des patients.
+        n (int): Nombre maximum de lignes à retourner.
+        by (tuple of str): Colonnes définissant les strates.
+        seed (int): Graine du générateur aléatoire, pour des résultats stables.
+
+    Returns:
+        pd.DataFrame: Échantillon respectant les proportions de chaque strate,
+                      dans l'ordre d'origine des lignes. Si `df` contient au plus
+                      `n` lignes, il est retourné tel quel.
+    """
+
+    if len(df) <= n:
+        return df
+    codes = df.groupby(list(by), sort=True).ngroup().to_numpy()
+    sizes = np.bincount(codes)
+    counts = _allocate(sizes, n)
+    rng = np.random.default_rng(seed)
+    order = np.argsort(codes, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    picked = [
+        rng.choice(order[start : start + size], size=count, replace=False)
+        for start, size, count in zip(starts, sizes, counts)
+        if count
+    ]
+    return df.iloc[np.sort(np.concatenate(picked))]
+
+
+def binned_density(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    bins: int = 50,
+) -> dict:
+    """
+    Agrège deux colonnes numériques en une grille 2-D de comptages.
+
+    Args:
+        df (pd.DataFrame): DataFrame des patients.
+        x (str): Colonne en abscisse.
+        y (str): Colonne en ordonnée.
+        bins (int): Nombre de classes par axe.
+
+    Returns:
+        dict: Bornes des classes (`x_edges`, `y_edges`) et liste des cases non vides,
+              chacune avec son centre (`x`, `y`), son effectif (`count`) et son
+              nombre d'AVC (`stroke`).
+
+    Remarques :
+    - Les patients dont `x` ou `y` est manquant ne sont comptés dans aucune case ;
+      s'il n'en reste aucun, les bornes et les cases sont vides.
+    """
+
+    xs, ys = df[x].to_numpy(dtype=float), df[y].to_numpy(dtype=float)
+    finite = np.isfinite(xs) & np.isfinite(ys)
+    if not finite.any():
+        return {"x_edges": [], "y_edges": [], "bins": []}
+    xs, ys = xs[finite], ys[finite]
+    counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=bins)
+    strokes, _, _ = np.histogram2d(
+        xs, ys, bins=[x_edges, y_edges], weights=df["stroke"].to_numpy()[finite]
+    )
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    ix, iy = np.nonzero(counts)
+    return {
+        "x_edges": x_edges.round(4).tolist(),
+        "y_edges": y_edges.round(4).tolist(),
+        "bins": [
+            {
+                "x": round(float(x_centers[i]), 4),
+                "y": round(float(y_centers[j]), 4),
+                "count": int(counts[i, j]),
+                "stroke": int(strokes[i, j]),
+            }
+            for i, j in zip(ix, iy)
+        ],
+    }
+
+
+def histogram(
+    values: np.ndarray, bins: int = 20, value_range: Optional[tuple] = None
+) -> dict:
+    """
+    Calcule un histogramme 1-D (bornes + effectifs).
+
+    Args:
+        values (np.ndarray): Valeurs numériques.
+        bins (int): Nombre de classes.
+        value_range (tuple, optional): Bornes (min, max) de l'histogramme.
+
+    Returns:
+        dict: `edges` (bins + 1 bornes) et `counts` (bins effectifs).
+
+    Remarques :
+    - Les valeurs manquantes ou infinies sont ignorées ; s'il n'en reste aucune
+      et que les bornes ne sont pas fournies, `edges` et `counts` sont vides.
+    """
+
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if not len(values) and np.ndim(bins) == 0 and value_range is None:
+        return {"edges": [], "counts": []}
+    counts, edges = np.histogram(values, bins=bins, range=value_range)
+    return {"edges": edges.round(4).tolist(), "counts": counts.tolist()}
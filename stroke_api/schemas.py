@@ -0,0 +1,198 @@
+from typing import Annotated, Literal, Optional, Union
+
+from pydantic import BaseModel, Field, field_validator
+
+from .config import MAX_BATCH_QUERIES, MAX_PAGE_SIZE, MAX_SAMPLE_POINTS
+
+MatchKey = Literal["gender", "hypertension", "heart_disease"]
+
+
+SortColumn = Literal[
+    "id", "age", "bmi", "avg_glucose_level", "risk_score", "gender", "stroke"
+]
+
+NumericColumn = Literal["age", "bmi", "avg_glucose_level"]
+
+RiskFactor = Literal[
+    "gender",
+    "hypertension",
+    "heart_disease",
+    "ever_married",
+    "work_type",
+    "Residence_type",
+    "smoking_status",
+]
+
+SketchKey = Literal["gender", "stroke", "hypertension", "heart_disease"]
+
+CategoricalColumn = Literal[
+    "gender",
+    "hypertension",
+    "heart_disease",
+    "ever_married",
+    "work_type",
+    "Residence_type",
+    "smoking_status",
+    "stroke",
+]
+
+
+class PatientFilters(BaseModel):
+    """
+    Critères de filtrage communs aux routes de lecture des patients.
+
+    Remarques :
+    - La tranche d'âge n'est appliquée que si `min_age` et `max_age` sont fournis.
+    """
+
+    gender: Optional[str] = None
+    stroke: Optional[int] = None
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+    min_risk: Optional[float] = Field(None, ge=0, le=1)
+    max_risk: Optional[float] = Field(None, ge=0, le=1)
+
+
+class PatientFeatures(BaseModel):
+    """
+    Variables explicatives d'un patient, utilisées par le modèle de risque.
+    """
+
+    gender: str
+    age: float = Field(ge=0, le=120)
+    hypertension: int = Field(ge=0, le=1)
+    heart_disease: int = Field(ge=0, le=1)
+    ever_married: str
+    work_type: str
+    Residence_type: str
+    avg_glucose_level: float = Field(gt=0)
+    bmi: float = Field(gt=0)
+    smoking_status: str
+
+
+class PatientRecord(PatientFeatures):
+    """
+    Enregistrement patient reçu par l'API, aligné sur les colonnes du dataset.
+
+    Remarques :
+    - Les indicateurs binaires (`hypertension`, `heart_disease`, `stroke`)
+      n'acceptent que 0 ou 1.
+    """
+
+    id: int
+    stroke: int = Field(ge=0, le=1)
+
+
+class BulkPatients(BaseModel):
+    """
+    Corps de la requête POST /patients/bulk : un lot de nouveaux patients.
+    """
+
+    records: list[PatientRecord] = Field(min_length=1)
+
+
+class SimilarRequest(BaseModel):
+    """
+    Corps de la requête POST /patients/similar : recherche de voisins pour plusieurs patients.
+    """
+
+    ids: list[int] = Field(min_length=1)
+    k: int = Field(5, ge=1)
+    match: list[MatchKey] = []
+
+
+class PredictRequest(BaseModel):
+    """
+    Corps de la requête POST /predict : patients à évaluer.
+    """
+
+    records: list[PatientFeatures] = Field(min_length=1)
+
+
+class SubQuery(BaseModel):
+    """
+    Base des sous-requêtes de POST /query/batch.
+
+    Remarques :
+    - `where` restreint la cohorte commune pour cette seule sous-requête.
+    """
+
+    where: Optional[PatientFilters] = None
+
+
+class PatientsQuery(SubQuery):
+    """Page de patients triée (équivalent de GET /patients/page)."""
+
+    type: Literal["patients"]
+    sort_by: Optional[SortColumn] = None
+    order: Literal["asc", "desc"] = "asc"
+    offset: int = Field(0, ge=0)
+    limit: int = Field(50, ge=1, le=MAX_PAGE_SIZE)
+
+
+class CountQuery(SubQuery):
+    """Nombre de patients de la cohorte."""
+
+    type: Literal["count"]
+
+
+class StatsQuery(SubQuery):
+    """Statistiques de la cohorte (mêmes champs que GET /stats/)."""
+
+    type: Literal["stats"]
+
+
+class GroupRateQuery(SubQuery):
+    """Effectifs et taux d'AVC par modalité d'une ou deux variables."""
+
+    type: Literal["group_rate"]
+    by: list[CategoricalColumn] = Field(min_length=1, max_length=2)
+
+
+class HistogramQuery(SubQuery):
+    """Histogramme d'une colonne numérique (nombre de classes ou bornes explicites)."""
+
+    type: Literal["histogram"]
+    column: NumericColumn = "age"
+    bins: int = Field(20, ge=1, le=500)
+    edges: Optional[list[float]] = Field(None, min_length=2)
+
+    @field_validator("edges")
+    @classmethod
+    def _increasing(cls, edges):
+        if edges is not None and any(a >= b for a, b in zip(edges, edges[1:])):
+            raise ValueError("Les bornes doivent être strictement croissantes.")
+        return edges
+
+
+class SampleQuery(SubQuery):
+    """Points bornés pour nuage de points (équivalent de GET /patients/sample)."""
+
+    type: Literal["sample"]
+    method: Literal["stratified", "density"] = "stratified"
+    n: int = Field(1000, ge=1, le=MAX_SAMPLE_POINTS)
+    x: NumericColumn = "age"
+    y: NumericColumn = "bmi"
+    bins: int = Field(50, ge=1, le=500)
+
+
+BatchQuery = Annotated[
+    Union[
+        PatientsQuery,
+        CountQuery,
+        StatsQuery,
+        GroupRateQuery,
+        HistogramQuery,
+        SampleQuery,
+    ],
+    Field(discriminator="type"),
+]
+
+
+class BatchRequest(BaseModel):
+    """
+    Corps de la requête POST /query/batch : filtre commun et sous-requêtes.
+    """
+
+    filters: PatientFilters = PatientFilters()
+    queries: list[BatchQuery] = Field(min_length=1, max_length=MAX_BATCH_QUERIES)
@@ -0,0 +1,226 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+SKETCH_COLUMNS = ("age", "bmi", "avg_glucose_level")
+SKETCH_KEYS = ("gender", "stroke", "hypertension", "heart_disease")
+
+# Nombre maximum de points conservés par cellule et par colonne.
+SKETCH_SIZE = 256
+
+
+def key_tuple(values) -> tuple:
+    """Convertit des valeurs de clés (scalaires NumPy compris) en tuple Python."""
+    return tuple(v.item() if hasattr(v, "item") else v for v in values)
+
+
+def summarize(values: np.ndarray, size: int = SKETCH_SIZE) -> tuple:
+    """
+    Résume des valeurs triées en au plus `size` points pondérés (blocs d'effectifs égaux).
+
+    Les valeurs sont découpées en `size` blocs contigus de tailles égales (à une
+    unité près) ; chaque bloc est représenté par son élément médian, pondéré par
+    la taille du bloc. Jusqu'à `size` valeurs, le résumé est exact (poids 1).
+
+    Args:
+        values (np.ndarray): Valeurs triées, sans NaN.
+        size (int): Nombre maximum de points du résumé.
+
+    Returns:
+        tuple: `(points, weights)`.
+    """
+
+    n = len(values)
+    if n <= size:
+        return values.astype(float), np.ones(n, dtype=np.int64)
+    bounds = np.linspace(0, n, size + 1).round().astype(np.int64)
+    starts, ends = bounds[:-1], bounds[1:]
+    return values[(starts + ends - 1) // 2].astype(float), ends - starts
+
+
+def weighted_quantiles(
+    points: np.ndarray,
+    weights: np.ndarray,
+    quantiles: list[float],
+    low: Optional[float] = None,
+    high: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Estime des quantiles à partir de points pondérés (issus d'un ou plusieurs résumés).
+
+    Chaque point est placé au rang qu'il occupe au centre de son bloc, puis les
+    quantiles sont interpolés linéairement entre ces rangs. Avec des poids
+    unitaires, le résultat est identique à `np.quantile` (méthode linéaire).
+
+    Args:
+        points (np.ndarray): Points des résumés fusionnés (ordre quelconque).
+        weights (np.ndarray): Poids (nombre de valeurs représentées) des points.
+        quantiles (list of float): Quantiles demandés, entre 0 et 1.
+        low (float, optional): Minimum exact, placé au premier rang.
+        high (float, optional): Maximum exact, placé au dernier rang.
+
+    Returns:
+        np.ndarray: Valeurs estimées des quantiles.
+    """
+
+    order = np.argsort(points, kind="stable")
+    points, weights = points[order], weights[order]
+    cumulative = np.cumsum(weights)
+    ranks = cumulative - weights + (weights - 1) / 2
+    last = cumulative[-1] - 1
+    if low is not None:
+        ranks, points = np.concatenate([[0], ranks]), np.concatenate([[low], points])
+    if high is not None:
+        ranks, points = np.append(ranks, last), np.append(points, high)
+    return np.interp(np.asarray(quantiles, dtype=float) * last, ranks, points)
+
+
+class QuantileSketchIndex:
+    """
+    Résumés de quantiles fusionnables des colonnes numériques, par cellule.
+
+    La table est partitionnée en cellules selon les valeurs de `SKETCH_KEYS`. Pour
+    chaque cellule et chaque colonne de `SKETCH_COLUMNS`, l'index conserve un
+    résumé d'au plus `SKETCH_SIZE` points pondérés (voir `summarize`) ainsi que
+    l'effectif, la somme, le minimum et le maximum exacts. Une requête fusionne
+    les résumés des cellules sélectionnées en concaténant leurs points.
+
+    Borne d'erreur : pour des cellules d'effectifs `n_c`, l'erreur sur le rang
+    d'un quantile estimé est au plus `Σ ⌈n_c / SKETCH_SIZE⌉ / 2`, soit environ
+    `N / (2 × SKETCH_SIZE)` plus une demi-unité par cellule résumée ; les
+    cellules d'au plus `SKETCH_SIZE` valeurs sont exactes.
+
+    Attributes:
+        cells (list of tuple): Valeurs de `SKETCH_KEYS` de chaque cellule.
+        points, weights, offsets (dict): Par colonne, points et poids concaténés
+            des résumés et bornes `[offsets[i], offsets[i + 1])` de la cellule `i`.
+        moments (dict): Par colonne, tableau (cellules, 4) : effectif, somme,
+            minimum et maximum.
+    """
+
+    def __init__(
+        self, cells: list, points: dict, weights: dict, offsets: dict, moments: dict
+    ):
+        self.cells = [tuple(cell) for cell in cells]
+        self.points = points
+        self.weights = weights
+        self.offsets = offsets
+        self.moments = moments
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "QuantileSketchIndex":
+        """
+        Construit les résumés sur une table de patients.
+
+        Args:
+            df (pd.DataFrame): Patients, avec `SKETCH_COLUMNS` et `SKETCH_KEYS`.
+
+        Returns:
+            QuantileSketchIndex: Index construit.
+        """
+
+        groups = df.groupby(list(SKETCH_KEYS), sort=True).indices if len(df) else {}
+        cells = [key_tuple(value) for value in groups]
+        points, weights, offsets, moments = {}, {}, {}, {}
+        for column in SKETCH_COLUMNS:
+            values = df[column].to_numpy(dtype=float)
+            column_points, column_weights = [], []
+            column_offsets = [0]
+            column_moments = np.full((len(cells), 4), np.nan)
+            for i, positions in enumerate(groups.values()):
+                cell_values = np.sort(values[positions])
+                cell_values = cell_values[~np.isnan(cell_values)]
+                p, w = summarize(cell_values)
+                column_points.append(p)
+                column_weights.append(w)
+                column_offsets.append(column_offsets[-1] + len(p))
+                column_moments[i, :2] = len(cell_values), cell_values.sum()
+                if len(cell_values):
+                    column_moments[i, 2:] = cell_values[0], cell_values[-1]
+            points[column] = np.concatenate(column_points or [np.zeros(0)])
+            weights[column] = np.concatenate(
+                column_weights or [np.zeros(0, dtype=np.int64)]
+            )
+            offsets[column] = np.asarray(column_offsets, dtype=np.int64)
+            moments[column] = column_moments
+        return cls(cells, points, weights, offsets, moments)
+
+    def to_arrays(self) -> tuple:
+        """
+        Exporte l'index sous forme de tableaux NumPy et de métadonnées JSON.
+
+        Returns:
+            tuple: `(arrays, meta)`, relu par `from_arrays`.
+        """
+
+        arrays = {}
+        for column in SKETCH_COLUMNS:
+            arrays[f"{column}_points"] = self.points[column]
+            arrays[f"{column}_weights"] = self.weights[column]
+            arrays[f"{column}_offsets"] = self.offsets[column]
+            arrays[f"{column}_moments"] = self.moments[column]
+        return arrays, {"cells": [list(cell) for cell in self.cells]}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, meta: dict) -> "QuantileSketchIndex":
+        """Reconstruit l'index à partir de la sortie de `to_arrays`."""
+        return cls(
+            meta["cells"],
+            *(
+                {column: arrays[f"{column}_{name}"] for column in SKETCH_COLUMNS}
+                for name in ("points", "weights", "offsets", "moments")
+            ),
+        )
+
+    def nbytes(self) -> int:
+        """Taille de l'index en mémoire (octets)."""
+        return sum(
+            array.nbytes
+            for arrays in (self.points, self.weights, self.offsets, self.moments)
+            for array in arrays.values()
+        )
+
+    def select(
+        self, gender: Optional[str] = None, stroke: Optional[int] = None
+    ) -> list[int]:
+        """Indices des cellules correspondant aux critères (`gender` insensible à la casse)."""
+        g, s = SKETCH_KEYS.index("gender"), SKETCH_KEYS.index("stroke")
+        return [
+            i
+            for i, cell in enumerate(self.cells)
+            if (gender is None or str(cell[g]).lower() == gender.lower())
+            and (stroke is None or cell[s] == stroke)
+        ]
+
+    def merge(self, column: str, cells: list[int]) -> tuple:
+        """
+        Fusionne les résumés de plusieurs cellules pour une colonne.
+
+        Returns:
+            tuple: `(points, weights, moments, error_ranks)` : points et poids
+                   concaténés, effectif/somme/min/max cumulés et borne de
+                   l'erreur de rang (en nombre de valeurs).
+        """
+
+        offsets = self.offsets[column]
+        slices = [slice(offsets[i], offsets[i + 1]) for i in cells]
+        points = np.concatenate(
+            [self.points[column][s] for s in slices] or [np.zeros(0)]
+        )
+        weights = np.concatenate(
+            [self.weights[column][s] for s in slices] or [np.zeros(0, dtype=np.int64)]
+        )
+        rows = self.moments[column][cells]
+        moments = (
+            rows[:, 0].sum(),
+            rows[:, 1].sum(),
+            np.nanmin(rows[:, 2]) if rows[:, 0].sum() else np.nan,
+            np.nanmax(rows[:, 3]) if rows[:, 0].sum() else np.nan,
+        )
+        error_ranks = sum(
+            np.ceil(count / SKETCH_SIZE) / 2
+            for count in rows[:, 0]
+            if count > SKETCH_SIZE
+        )
+        return points, weights, moments, error_ranks
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# À incrémenter dès que le format des fichiers ou des index change.
+SNAPSHOT_FORMAT = 2
+
+
+def file_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    """
+    Calcule l'empreinte SHA-256 d'un fichier, lu par blocs.
+
+    Args:
+        path (Path): Fichier à hacher.
+        chunk_size (int): Taille des blocs lus (octets).
+
+    Returns:
+        str: Empreinte hexadécimale.
+    """
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_dir(cache_dir: Path, source: Path, key: str) -> Path:
+    """Répertoire du snapshot d'un fichier source pour une clé donnée."""
+    return Path(cache_dir) / f"{Path(source).stem}-{key[:16]}"
+
+
+def snapshot_key(source_hash: str, fingerprint: str = "") -> str:
+    """
+    Construit la clé d'un snapshot à partir de l'empreinte du fichier source.
+
+    Args:
+        source_hash (str): Empreinte SHA-256 du fichier Parquet source.
+        fingerprint (str): Empreinte des autres dépendances de la préparation
+            (ex. le modèle utilisé pour `risk_score`).
+
+    Returns:
+        str: Clé hexadécimale du snapshot.
+    """
+
+    raw = f"{SNAPSHOT_FORMAT}:{source_hash}:{fingerprint}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def save_snapshot(
+    cache_dir: Path,
+    source: Path,
+    key: str,
+    table: pd.DataFrame,
+    raw_columns: list[str],
+    indexes: dict,
+) -> Path:
+    """
+    Écrit un snapshot : table préparée (Arrow IPC) et index dérivés (`.npy`).
+
+    Le snapshot est écrit dans un répertoire temporaire puis renommé, de sorte
+    qu'un lecteur ne voie jamais un snapshot incomplet. Les anciens snapshots
+    du même fichier source sont supprimés.
+
+    Args:
+        cache_dir (Path): Répertoire des snapshots.
+        source (Path): Fichier Parquet d'origine.
+        key (str): Clé du snapshot (voir `snapshot_key`).
+        table (pd.DataFrame): Table préparée (colonnes dérivées incluses).
+        raw_columns (list of str): Colonnes présentes dans le fichier source.
+        indexes (dict): Index dérivés par nom, exposant `to_arrays()`.
+
+    Returns:
+        Path: Répertoire du snapshot.
+    """
+
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=cache_dir, prefix=".tmp-"))
+    try:
+        # `mkdtemp` crée le répertoire en 0700 : il reprend les droits du
+        # répertoire du cache pour rester lisible par les autres processus.
+        os.chmod(tmp_dir, cache_dir.stat().st_mode & 0o777)
+        arrow_table = pa.Table.from_pandas(table, preserve_index=False)
+        with pa.OSFile(str(tmp_dir / "table.arrow"), "wb") as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+
+        index_meta = {}
+        for name, index in indexes.items():
+            arrays, meta = index.to_arrays()
+            (tmp_dir / name).mkdir()
+            for array_name, array in arrays.items():
+                np.save(tmp_dir / name / f"{array_name}.npy", np.asarray(array))
+            index_meta[name] = {"arrays": sorted(arrays), "meta": meta}
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "key": key,
+            "source": Path(source).name,
+            "raw_columns": list(raw_columns),
+            "indexes": index_meta,
+        }
+        (tmp_dir / "manifest.json").write_text(json.dumps(manifest))
+
+        target = snapshot_dir(cache_dir, source, key)
+        # `<nom>-<clé>` exactement : `stroke-*` ne doit pas viser `stroke-2024-<clé>`.
+        own = re.compile(re.escape(Path(source).stem) + "-[0-9a-f]{16}")
+        for old in cache_dir.iterdir():
+            if old != target and own.fullmatch(old.name):
+                shutil.rmtree(old, ignore_errors=True)
+        try:
+            os.replace(tmp_dir, target)
+        except OSError:
+            # Snapshot identique déjà écrit (par un autre processus, par ex.).
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return target
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def load_snapshot(
+    cache_dir: Path, source: Path, key: str, index_types: dict
+) -> Optional[tuple]:
+    """
+    Charge un snapshot par projection mémoire, s'il existe et correspond à la clé.
+
+    Args:
+        cache_dir (Path): Répertoire des snapshots.
+        source (Path): Fichier Parquet d'origine.
+        key (str): Clé attendue (voir `snapshot_key`).
+        index_types (dict): Classes des index attendus par nom, exposant
+            `from_arrays(arrays, meta)`.
+
+    Returns:
+        tuple | None: `(table, raw_columns, indexes)`, ou None si le snapshot est
+                      absent, d'un autre format ou incomplet.
+
+    Remarques :
+    - Les colonnes numériques de la table et les tableaux des index restent
+      projetés en mémoire (`mmap`) : ils ne sont pas copiés au chargement.
+    """
+
+    directory = snapshot_dir(cache_dir, source, key)
+    try:
+        manifest = json.loads((directory / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("key") != key:
+        return None
+    if not set(index_types) <= set(manifest["indexes"]):
+        return None
+
+    source_file = pa.memory_map(str(directory / "table.arrow"), "r")
+    table = pa.ipc.open_file(source_file).read_all().to_pandas(split_blocks=True)
+
+    indexes = {}
+    for name, index_type in index_types.items():
+        entry = manifest["indexes"][name]
+        arrays = {
+            array_name: np.load(directory / name / f"{array_name}.npy", mmap_mode="r")
+            for array_name in entry["arrays"]
+        }
+        indexes[name] = index_type.from_arrays(arrays, entry["meta"])
+    return table, manifest["raw_columns"], indexes
@@ -0,0 +1,552 @@
+import asyncio
+import bisect
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class StoreClosedError(RuntimeError):
+    """Levée lors d'une écriture dans un stockage fermé (dataset évincé)."""
+
+
+class TableView:
+    """
+    Vue immuable sur les données : table de base + segments delta ajoutés.
+
+    Une vue n'est jamais modifiée après sa publication ; les lecteurs peuvent
+    donc l'utiliser sans verrou pendant qu'un écrivain en prépare une nouvelle.
+
+    Attributes:
+        base (pd.DataFrame): Table chargée depuis le dernier snapshot Parquet.
+        delta (tuple of pd.DataFrame): Lots ajoutés depuis ce snapshot, dans l'ordre.
+        version (int): Numéro de version des données (incrémenté à chaque lot).
+        generation (int): Numéro du snapshot de base (incrémenté à chaque compaction).
+        indexes (dict): Index dérivés construits sur `base` (par nom).
+        delta_ids (dict): Position globale de chaque identifiant du delta.
+    """
+
+    def __init__(
+        self,
+        base: pd.DataFrame,
+        delta: tuple = (),
+        version: int = 0,
+        generation: int = 0,
+        indexes: Optional[dict] = None,
+        delta_ids: Optional[dict] = None,
+        segment_memo: Optional[dict] = None,
+    ):
+        self.base = base
+        self.delta = delta
+        self.version = version
+        self.generation = generation
+        self.indexes = indexes or {}
+        self._offsets = [len(base)]
+        for batch in delta:
+            self._offsets.append(self._offsets[-1] + len(batch))
+        if delta_ids is None:
+            delta_ids = {}
+            for start, batch in zip(self._offsets, delta):
+                delta_ids.update(_positions(batch, start))
+        self.delta_ids = delta_ids
+        # Partagé par les vues d'une même génération (voir `segments`).
+        self._segment_memo = {} if segment_memo is None else segment_memo
+        self._memo: OrderedDict = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    @property
+    def n_rows(self) -> int:
+        """Nombre total de lignes visibles (base + delta)."""
+        return self._offsets[-1]
+
+    @property
+    def n_delta_rows(self) -> int:
+        """Nombre de lignes présentes dans le delta."""
+        return self.n_rows - len(self.base)
+
+    @cached_property
+    def frame(self) -> pd.DataFrame:
+        """
+        Table complète (base puis delta), construite une seule fois par vue.
+
+        Returns:
+            pd.DataFrame: Concaténation de la base et des lots delta, avec un
+                          index positionnel 0..n-1.
+        """
+        if not self.delta:
+            return self.base
+        return pd.concat([self.base, *self.delta], ignore_index=True)
+
+    def memoize(self, key, compute: Callable[[], object], max_entries: int = 256):
+        """
+        Retourne un résultat dérivé de la vue, calculé au plus une fois par vue.
+
+        La vue étant immuable, un résultat calculé sur elle reste valable tant
+        qu'elle existe : le cache suit donc naturellement la version des données.
+
+        Args:
+            key (hashable): Clé du résultat.
+            compute (callable): Fonction sans argument calculant le résultat.
+            max_entries (int): Nombre maximum de résultats conservés ; les moins
+                récemment utilisés sont oubliés au-delà.
+
+        Returns:
+            object: Résultat en cache ou nouvellement calculé.
+        """
+        with self._memo_lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        value = compute()
+        with self._memo_lock:
+            self._memo[key] = value
+            while len(self._memo) > max_entries:
+                self._memo.popitem(last=False)
+        return value
+
+    def memoized(self, key) -> bool:
+        """Indique si le résultat `key` est déjà en cache sur la vue (voir `memoize`)."""
+        with self._memo_lock:
+            return key in self._memo
+
+    def segments(self, key, compute: Callable[[pd.DataFrame], object]) -> list:
+        """
+        Applique `compute` à la base puis à chaque lot delta, une fois par segment.
+
+        Les vues d'une même génération partagent leur base et les premiers lots
+        de leur delta : un résultat calculé sur un segment est donc réutilisé par
+        toutes les vues suivantes, et un ajout ne coûte que le calcul sur le
+        nouveau lot.
+
+        Args:
+            key (hashable): Clé du résultat.
+            compute (callable): Fonction `compute(segment)` sur un DataFrame.
+
+        Returns:
+            list: Résultat de chaque segment, base en premier.
+        """
+        results = []
+        for i, segment in enumerate((self.base, *self.delta)):
+            value = self._segment_memo.get((key, i))
+            if value is None:
+                value = self._segment_memo.setdefault((key, i), compute(segment))
+            results.append(value)
+        return results
+
+    def row(self, position: int) -> dict:
+        """
+        Retourne la ligne à la position donnée sans matérialiser `frame`.
+
+        Args:
+            position (int): Position globale de la ligne (0 <= position < n_rows).
+
+        Returns:
+            dict: Ligne sous forme de dictionnaire.
+        """
+        segment = bisect.bisect_right(self._offsets, position)
+        if segment == 0:
+            return self.base.iloc[[position]].to_dict("records")[0]
+        local = position - self._offsets[segment - 1]
+        return self.delta[segment - 1].iloc[[local]].to_dict("records")[0]
+
+    def rows(self, positions: list[int]) -> list[dict]:
+        """
+        Retourne plusieurs lignes à partir de leurs positions, dans l'ordre donné.
+
+        Args:
+            positions (list of int): Positions globales des lignes.
+
+        Returns:
+            list of dict: Lignes sous forme de dictionnaires.
+        """
+        if not positions:
+            return []
+        source = self.base if max(positions) < len(self.base) else self.frame
+        return source.take(positions).to_dict("records")
+
+    def locate(self, patient_id: int) -> Optional[int]:
+        """Retourne la position d'un identifiant dans la vue, ou None s'il est absent."""
+        position = self.indexes["id"].get(patient_id)
+        if position is None:
+            position = self.delta_ids.get(patient_id)
+        return position
+
+    def with_batch(self, batch: pd.DataFrame) -> "TableView":
+        """Retourne une nouvelle vue contenant un lot delta supplémentaire."""
+        return TableView(
+            self.base,
+            self.delta + (batch,),
+            self.version + 1,
+            self.generation,
+            self.indexes,
+            {**self.delta_ids, **_positions(batch, self.n_rows)},
+            self._segment_memo,
+        )
+
+
+def _positions(batch: pd.DataFrame, start: int) -> dict:
+    """Positions globales des identifiants d'un lot commençant à `start`."""
+    return {int(pid): start + offset for offset, pid in enumerate(batch["id"])}
+
+
+class IdIndex:
+    """
+    Index des identifiants de la base : identifiants triés et positions associées.
+
+    La recherche se fait par dichotomie (`np.searchsorted`), sans dictionnaire
+    Python, ce qui permet de conserver l'index sous forme de tableaux projetés
+    en mémoire dans le snapshot.
+    """
+
+    def __init__(self, ids: np.ndarray, positions: np.ndarray):
+        self.ids = ids
+        self.positions = positions
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "IdIndex":
+        """Construit l'index à partir de la colonne `id`."""
+        ids = df["id"].to_numpy(dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        return cls(ids[order], order.astype(np.int64))
+
+    def get(self, patient_id: int) -> Optional[int]:
+        """Retourne la position d'un identifiant, ou None s'il est absent."""
+        i = int(np.searchsorted(self.ids, patient_id))
+        if i < len(self.ids) and self.ids[i] == patient_id:
+            return int(self.positions[i])
+        return None
+
+    def nbytes(self) -> int:
+        """Taille de l'index en mémoire (octets)."""
+        return self.ids.nbytes + self.positions.nbytes
+
+    def to_arrays(self) -> tuple:
+        return {"ids": self.ids, "positions": self.positions}, {}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, meta: dict) -> "IdIndex":
+        return cls(arrays["ids"], arrays["positions"])
+
+
+class PatientStore:
+    """
+    Stockage des patients : snapshot Parquet + delta en mémoire, en ajout seul.
+
+    - Les lecteurs récupèrent la vue courante (`view`) sans prendre de verrou.
+    - Les écritures (`append`) construisent une nouvelle vue puis la publient
+      par simple réaffectation de référence.
+    - `compact` fusionne le delta dans un nouveau fichier Parquet.
+
+    Les index dérivés (dont l'index des identifiants "id") sont construits sur
+    la base uniquement, et reconstruits lors de la compaction avant la publication
+    de la nouvelle vue. Les identifiants du delta sont suivis dans un dictionnaire
+    porté par la vue elle-même, publié avec elle.
+
+    Le fichier source n'est jamais modifié : chaque compaction écrit une nouvelle
+    génération `data/.generations/<nom>-<empreinte>/<n>.parquet`, associée à
+    l'empreinte du fichier source. Au chargement, la dernière génération de la
+    source courante est utilisée.
+
+    Lorsque `cache_dir` est fourni, la table préparée et les index sont conservés
+    dans un snapshot sur disque, associé à l'empreinte du fichier Parquet : un
+    redémarrage se contente alors de projeter ces fichiers en mémoire.
+
+    Args:
+        path (Path): Fichier Parquet des patients.
+        prepare (callable, optional): Fonction `prepare(df) -> df` ajoutant des
+            colonnes dérivées (ex. `risk_score`), appliquée à la base et à chaque
+            lot ajouté. Les colonnes dérivées ne sont pas écrites dans le Parquet.
+        indexes (dict, optional): Classes d'index dérivés par nom, exposant
+            `build(df)`, `to_arrays()` et `from_arrays(arrays, meta)`.
+        cache_dir (Path, optional): Répertoire des snapshots ; None pour désactiver.
+        fingerprint (str): Empreinte des dépendances de `prepare` (ex. le modèle),
+            intégrée à la clé du snapshot.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        prepare: Optional[Callable] = None,
+        indexes: Optional[dict] = None,
+        cache_dir: Optional[Path] = None,
+        fingerprint: str = "",
+    ):
+        self.path = Path(path)
+        self._prepare = prepare or (lambda df: df)
+        self._index_types = {"id": IdIndex, **(indexes or {})}
+        self._cache_dir = cache_dir
+        self._fingerprint = fingerprint
+        self._write_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._closed = False
+        self._base_nbytes = (-1, 0)
+
+        source_hash = snapshot.file_hash(self.path)
+        self._source, _ = self._latest_generation(source_hash)
+        self._source_hash = (
+            source_hash
+            if self._source == self.path
+            else snapshot.file_hash(self._source)
+        )
+        key = snapshot.snapshot_key(self._source_hash, fingerprint)
+        loaded = None
+        if cache_dir is not None:
+            loaded = snapshot.load_snapshot(
+                cache_dir, self.path, key, self._index_types
+            )
+        if loaded is not None:
+            base, raw_columns, built = loaded
+        else:
+            raw = pd.read_parquet(self._source)
+            raw_columns = list(raw.columns)
+            base = self._prepare(raw)
+            built = self._build_indexes(base)
+            self._save_snapshot(key, base, raw_columns, built)
+        self._raw_dtypes = base[raw_columns].dtypes.to_dict()
+        self._view = TableView(base, indexes=built)
+
+    def _generation_dir(self, source_hash: str) -> Path:
+        return (
+            self.path.parent / ".generations" / f"{self.path.stem}-{source_hash[:16]}"
+        )
+
+    def _latest_generation(self, source_hash: str) -> tuple:
+        """Dernière génération compactée de la source : `(fichier, numéro)`, ou la source elle-même (0)."""
+        files = sorted(self._generation_dir(source_hash).glob("*.parquet"))
+        if not files:
+            return self.path, 0
+        return files[-1], int(files[-1].stem)
+
+    def _build_indexes(self, base: pd.DataFrame) -> dict:
+        return {name: cls.build(base) for name, cls in self._index_types.items()}
+
+    def _save_snapshot(self, key, base, raw_columns, indexes) -> None:
+        # Cache au mieux : un disque plein ou en lecture seule n'empêche pas de
+        # servir la table qui vient d'être construite.
+        if self._cache_dir is not None:
+            try:
+                snapshot.save_snapshot(
+                    self._cache_dir, self.path, key, base, raw_columns, indexes
+                )
+            except OSError as e:
+                logger.warning("Snapshot non enregistré pour %s : %s", self.path, e)
+
+    @property
+    def view(self) -> TableView:
+        """Vue courante et immuable des données."""
+        return self._view
+
+    def frame(self) -> pd.DataFrame:
+        """Table complète (base + delta) de la vue courante."""
+        return self._view.frame
+
+    def nbytes(self) -> int:
+        """
+        Estime l'empreinte mémoire du stockage (table, delta et index).
+
+        Returns:
+            int: Taille en octets. La part de la base est calculée une fois par
+                 génération ; celle du delta à chaque appel.
+        """
+        view = self._view
+        generation, base_nbytes = self._base_nbytes
+        if generation != view.generation:
+            base_nbytes = int(view.base.memory_usage(deep=True).sum()) + sum(
+                index.nbytes()
+                for index in view.indexes.values()
+                if hasattr(index, "nbytes")
+            )
+            self._base_nbytes = (view.generation, base_nbytes)
+        return base_nbytes + sum(
+            int(batch.memory_usage(deep=True).sum()) for batch in view.delta
+        )
+
+    def locate(self, patient_id: int) -> Optional[tuple]:
+        """
+        Retourne la vue courante et la position d'un patient dans cette vue.
+
+        Args:
+            patient_id (int): Identifiant du patient.
+
+        Returns:
+            tuple | None: `(view, position)`, ou None si le patient n'existe pas.
+        """
+        view = self._view
+        position = view.locate(patient_id)
+        if position is None:
+            return None
+        return view, position
+
+    def get(self, patient_id: int) -> Optional[dict]:
+        """
+        Recherche un patient par son identifiant via l'index.
+
+        Args:
+            patient_id (int): Identifiant du patient.
+
+        Returns:
+            dict | None: Le patient, ou None s'il n'existe pas dans la vue courante.
+        """
+        located = self.locate(patient_id)
+        if located is None:
+            return None
+        view, position = located
+        return view.row(position)
+
+    def append(self, records: list[dict]) -> dict:
+        """
+        Ajoute un lot de patients au delta et met à jour l'index des identifiants.
+
+        Args:
+            records (list of dict): Patients à ajouter (mêmes colonnes que la base).
+
+        Returns:
+            dict: `inserted` (nombre de lignes ajoutées), `rejected_ids` (identifiants
+                  déjà présents ou dupliqués dans le lot) et `version`.
+
+        Raises:
+            StoreClosedError: Si le stockage a été fermé (voir `close`).
+        """
+        with self._write_lock:
+            if self._closed:
+                raise StoreClosedError(self.path.stem)
+            view = self._view
+            accepted, rejected, seen = [], [], set()
+            for record in records:
+                pid = int(record["id"])
+                if pid in seen or view.locate(pid) is not None:
+                    rejected.append(pid)
+                    continue
+                seen.add(pid)
+                accepted.append(record)
+
+            if accepted:
+                batch = pd.DataFrame(accepted, columns=list(self._raw_dtypes))
+                batch = self._prepare(batch.astype(self._raw_dtypes))
+                view = view.with_batch(batch)
+                self._view = view
+
+            return {
+                "inserted": len(accepted),
+                "rejected_ids": rejected,
+                "version": view.version,
+            }
+
+    def compact(self) -> bool:
+        """
+        Fusionne le delta courant dans une nouvelle génération Parquet.
+
+        La génération est écrite dans un fichier temporaire puis publiée par un
+        lien exclusif : si un autre processus a publié la même génération entre
+        temps, ou si le fichier chargé a changé (empreinte différente), ses
+        lignes sont relues et seuls les patients absents du delta y sont
+        ajoutés, sans rien écraser. Les index et le snapshot sur disque sont
+        reconstruits pour la nouvelle base. Les lots arrivés pendant l'écriture
+        restent dans le delta de la nouvelle vue.
+
+        Returns:
+            bool: True si une compaction a eu lieu, False si le delta était vide.
+        """
+        with self._compact_lock:
+            view = self._view
+            if not view.delta:
+                return False
+            raw_columns = list(self._raw_dtypes)
+            source_hash = snapshot.file_hash(self.path)
+            while True:
+                latest, number = self._latest_generation(source_hash)
+                rebased = latest != self._source or (
+                    latest == self.path and source_hash != self._source_hash
+                )
+                if rebased:
+                    base = self._prepare(pd.read_parquet(latest))
+                    added = pd.concat(view.delta, ignore_index=True)
+                    added = added[~added["id"].isin(base["id"])]
+                    merged = pd.concat([base, added], ignore_index=True)
+                else:
+                    merged = view.frame
+                target = self._generation_dir(source_hash) / f"{number + 1:06d}.parquet"
+                if _publish(merged[raw_columns], target):
+                    break
+            for old in target.parent.glob("*.parquet"):
+                if int(old.stem) < number:
+                    old.unlink(missing_ok=True)
+
+            indexes = self._build_indexes(merged)
+            self._source, self._source_hash = target, snapshot.file_hash(target)
+            key = snapshot.snapshot_key(self._source_hash, self._fingerprint)
+            self._save_snapshot(key, merged, raw_columns, indexes)
+
+            with self._write_lock:
+                current = self._view
+                remaining = current.delta[len(view.delta) :]
+                if rebased:
+                    remaining = tuple(
+                        batch[~batch["id"].isin(merged["id"])].reset_index(drop=True)
+                        for batch in remaining
+                    )
+                self._view = TableView(
+                    merged, remaining, current.version, current.generation + 1, indexes
+                )
+            return True
+
+    def close(self) -> None:
+        """
+        Ferme le stockage : refuse les écritures suivantes puis compacte le delta.
+
+        Les lecteurs qui détiennent encore une vue peuvent continuer à l'utiliser.
+        """
+        with self._write_lock:
+            self._closed = True
+        self.compact()
+
+
+def _publish(frame: pd.DataFrame, target: Path) -> bool:
+    """
+    Écrit `frame` dans `target` si ce fichier n'existe pas encore.
+
+    Returns:
+        bool: False si `target` existe déjà (publié par un autre processus).
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(
+        f".{target.stem}-{os.getpid()}-{threading.get_ident()}.tmp"
+    )
+    try:
+        frame.to_parquet(tmp_path, index=False)
+        os.link(tmp_path, target)
+    except FileExistsError:
+        return False
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return True
+
+
+async def run_compaction(compact: Callable[[], None], interval: float) -> None:
+    """
+    Boucle de compaction périodique, à lancer en tâche de fond.
+
+    La compaction s'exécute dans un thread pour ne pas bloquer la boucle
+    d'événements ni les requêtes de lecture. Une compaction en échec est
+    journalisée et la boucle continue : elle sera retentée à l'itération suivante.
+
+    Args:
+        compact (callable): Fonction de compaction (ex. `registry.compact_all`).
+        interval (float): Délai en secondes entre deux compactions.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(compact)
+        except Exception:
+            logger.exception("Échec de la compaction périodique")